@@ -0,0 +1,68 @@
+'''
+A local stand-in for the spacetime cache server. It answers
+GET /?q=<url>&u=<user agent> with a CBOR encoded dict holding the pickled
+page, the same way utils/download.py expects it from the real server.
+'''
+import cbor
+import pickle
+import requests
+
+from threading import Thread
+from urllib.parse import urlparse, parse_qs
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def raw_response(url, status, content):
+    # the real server pickles the requests.Response it got from the web server
+    resp = requests.models.Response()
+    resp.url = url
+    resp.status_code = status
+    resp._content = content
+    resp.headers["Content-Type"] = "text/html"
+    return resp
+
+
+class CacheServer(object):
+    ''' Serves pages(url) -> (status, content bytes) on localhost.
+    A `status` of 5xx is sent as the http status itself, like a failing server. '''
+
+    def __init__(self, pages, port=0):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"   # keep-alive
+            disable_nagle_algorithm = True  # headers and body are separate writes
+
+            def do_GET(self):
+                query = parse_qs(urlparse(self.path).query)
+                url = query.get("q", [""])[0]
+                status, content = server.pages(url)
+                server.requests += 1
+                if status >= 500:
+                    body, http_status = b"", status
+                else:
+                    body, http_status = cbor.dumps({
+                        "url": url, "status": status,
+                        "response": pickle.dumps(raw_response(url, status, content))}), 200
+                self.send_response(http_status)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.pages = pages
+        self.requests = 0
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        self.httpd.daemon_threads = True
+        self.address = self.httpd.server_address   # (host, port), usable as config.cache_server
+        self.thread = Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
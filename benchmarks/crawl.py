@@ -0,0 +1,230 @@
+'''
+Crawls a synthetic web end to end, without the spacetime registration or the
+real cache server: a seeded link graph is served by the local stand-in cache
+server (benchmarks/cache_server.py) and the Crawler runs against it with the
+settings of config.ini (data and save file go to a temporary directory).
+Reports pages/sec, p50/p99 per-page latency (from the frontier handing the
+url to a worker until it is marked complete) and peak RSS.
+    Run from the project root:
+        python -m benchmarks.crawl --hosts 8 --pages 500 --fanout 10 --page-kb 20 --traps 2 --mirrors 0.1
+    To compare url orders on a time-boxed crawl, stop after --limit urls:
+        python -m benchmarks.crawl --limit 1000 --priority fifo
+    The same --seed always gives the same web, so runs can be compared.
+'''
+import os
+import json
+import time
+import random
+import resource
+import tempfile
+from datetime import date, timedelta
+from argparse import ArgumentParser
+from configparser import ConfigParser
+from threading import Lock
+
+import scraper
+from utils.config import Config
+from crawler import Crawler
+from crawler.frontier import Frontier
+from crawler.worker import Worker, PoolWorker
+from benchmarks.cache_server import CacheServer
+
+SYLLABLES = ("ka", "ri", "to", "me", "sa", "lu", "ne", "po", "vi", "da", "ge", "zo")
+VOCABULARY_SIZE = 5000
+TOPIC_SIZE = 100
+
+
+class SyntheticWeb(object):
+    ''' `hosts` hosts with `pages` pages each. Page i of a host links to
+    `fanout` random pages (mostly on the same host) and, on `traps` of the
+    hosts, to an endless calendar whose days link to the next day with a
+    fresh session id. Each page's text mixes words of its own topic with
+    random words, except for a `mirrors` fraction of pages that all have the
+    same text as their host's mirror page. Every page is generated from the
+    seed and its url. '''
+
+    def __init__(self, seed, hosts, pages, fanout, page_kb, traps, mirrors):
+        self.seed = seed
+        self.hosts = [f"h{host}.ics.uci.edu" for host in range(hosts)]
+        self.pages = pages
+        self.fanout = fanout
+        self.page_kb = page_kb
+        self.trap_hosts = set(self.hosts[:traps])
+        self.mirrors = mirrors
+        rand = random.Random(seed)
+        vocabulary = set()
+        while len(vocabulary) < VOCABULARY_SIZE:
+            vocabulary.add("".join(rand.choice(SYLLABLES) for _ in range(rand.randint(2, 4))))
+        self.vocabulary = sorted(vocabulary)
+
+    def page_url(self, host, page):
+        # no numbers in page urls, so they do not all share one trap template
+        words = self.vocabulary
+        return f"https://{host}/{words[page % len(words)]}/{words[page // len(words) % len(words)]}.html"
+
+    @property
+    def seed_url(self):
+        return self.page_url(self.hosts[0], 0)
+
+    def _text(self, rand):
+        topic = rand.sample(self.vocabulary, TOPIC_SIZE)
+        words = list()
+        length = 0
+        while length < self.page_kb * 1024:
+            word = rand.choice(topic) if rand.random() < 0.6 else rand.choice(self.vocabulary)
+            words.append(word)
+            length += len(word) + 1
+        paragraphs = (" ".join(words[i:i + 100]) for i in range(0, len(words), 100))
+        return "".join(f"<p>{paragraph}</p>" for paragraph in paragraphs)
+
+    def _page_links(self, rand, host):
+        for _ in range(self.fanout):
+            target = host if rand.random() < 0.8 else rand.choice(self.hosts)
+            yield self.page_url(target, rand.randrange(self.pages))
+        if host in self.trap_hosts:
+            yield f"https://{host}/calendar/2020-01-01?session={rand.getrandbits(64):016x}"
+
+    def _calendar_links(self, rand, host, day):
+        yield f"https://{host}/calendar/{day + timedelta(days=1)}?session={rand.getrandbits(64):016x}"
+        yield self.page_url(host, rand.randrange(self.pages))
+
+    def __call__(self, url):
+        ''' (status, content) of url, for CacheServer. '''
+        host, _, path = url.partition("://")[2].partition("/")
+        rand = random.Random(f"{self.seed}:{url}")
+        if host not in self.hosts:
+            return 404, b""
+        if path.endswith(".html"):
+            links = self._page_links(rand, host)
+        elif path.startswith("calendar/") and host in self.trap_hosts:
+            day = date.fromisoformat(path.split("/")[1].partition("?")[0])
+            links = self._calendar_links(rand, host, day)
+        else:
+            return 404, b""
+        anchors = "".join(f'<a href="{link}">link</a> ' for link in links)
+        text_rand = random.Random(f"{self.seed}:{host}:mirror") if rand.random() < self.mirrors else rand
+        body = f"<html><head><title>{host}</title></head><body>{self._text(text_rand)}{anchors}</body></html>"
+        return 200, body.encode("utf-8")
+
+
+class TimedFrontier(Frontier):
+    ''' Frontier that records how long each url is out with a worker, and
+    stops handing out urls after `limit` (if not 0). '''
+
+    def __init__(self, limit, config, restart):
+        self.limit = limit
+        self.handed_out = 0
+        self.started = dict()
+        self.latencies = list()
+        self.timing_lock = Lock()
+        super().__init__(config, restart)
+
+    def get_tbd_url(self):
+        url = super().get_tbd_url()
+        if url:
+            with self.timing_lock:
+                over = self.limit and self.handed_out >= self.limit
+                self.handed_out += 1
+                if not over:
+                    self.started[url] = time.perf_counter()
+            if over:
+                super().mark_url_complete(url)
+                return None
+        return url
+
+    def mark_url_complete(self, url):
+        super().mark_url_complete(url)
+        with self.timing_lock:
+            started = self.started.pop(url, None)
+            if started is not None:
+                self.latencies.append(time.perf_counter() - started)
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(int(fraction * len(values)), len(values) - 1)] if values else 0.0
+
+
+def make_config(config_file, directory, seed_url, threads, parse_processes, politeness, priority):
+    cparser = ConfigParser()
+    cparser.read(config_file)
+    local = cparser["LOCAL PROPERTIES"]
+    local["SAVE"] = os.path.join(directory, "frontier.save")
+    local["DATA"] = os.path.join(directory, "data")
+    local["THREADCOUNT"] = str(threads)
+    local["PARSEPROCESSES"] = str(parse_processes)
+    local["STATSINTERVAL"] = "0"
+    local["STATSPORT"] = "0"
+    cparser["CRAWLER"]["SEEDURL"] = seed_url
+    cparser["CRAWLER"]["POLITENESS"] = str(politeness)
+    if priority is not None:
+        cparser["CRAWLER"]["PRIORITY"] = priority
+    config = Config(cparser)
+
+    os.makedirs(config.data_dir)
+    with open(config.urls_file, 'w') as file:
+        json.dump({}, file)
+    with open(config.sorted_urls_file, 'w') as file:
+        json.dump({"urls": []}, file)
+    return config
+
+
+def main(args):
+    web = SyntheticWeb(
+        args.seed, args.hosts, args.pages, args.fanout, args.page_kb, args.traps, args.mirrors)
+    server = CacheServer(web).start()
+    with tempfile.TemporaryDirectory() as directory:
+        config = make_config(
+            args.config_file, directory, web.seed_url,
+            args.threads, args.parse_processes, args.politeness, args.priority)
+        config.cache_server = server.address     # no registration, straight to the stand-in
+
+        frontiers = list()
+
+        def frontier_factory(config, restart):
+            frontiers.append(TimedFrontier(args.limit, config, restart))
+            return frontiers[-1]
+
+        crawler = Crawler(
+            config, True, frontier_factory=frontier_factory,
+            worker_factory=PoolWorker if args.parse_processes > 0 else Worker)
+        start = time.perf_counter()
+        crawler.start()
+        elapsed = time.perf_counter() - start
+        # write the scraper's data before the temporary directory goes away
+        scraper.page_store.flush(snapshot=True)
+        scraper.token_index.close()
+        scraper.page_fingerprints.close()
+
+        with open(config.urls_file, 'r') as file:
+            stored = len(json.load(file))
+    server.stop()
+
+    latencies = frontiers[0].latencies
+    rss = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+              resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)   # KiB on Linux
+    print(f"{len(latencies)} pages crawled ({stored} stored, {server.requests} requests) in {elapsed:.2f}s")
+    print(f"{len(latencies) / elapsed:,.1f} pages/sec")
+    print(f"per-page latency p50 {percentile(latencies, 0.5) * 1000:.1f}ms, "
+          f"p99 {percentile(latencies, 0.99) * 1000:.1f}ms")
+    print(f"peak RSS {rss / 1024:.1f} MiB")
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser()
+    parser.add_argument("--config_file", type=str, default="config.ini")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--hosts", type=int, default=8)
+    parser.add_argument("--pages", type=int, default=500, help="pages per host")
+    parser.add_argument("--fanout", type=int, default=10)
+    parser.add_argument("--page-kb", type=int, default=20)
+    parser.add_argument("--traps", type=int, default=2, help="hosts with an endless calendar")
+    parser.add_argument("--mirrors", type=float, default=0.1, help="fraction of pages with duplicate text")
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--parse-processes", type=int, default=0)
+    parser.add_argument("--politeness", type=float, default=0.0)
+    parser.add_argument("--priority", type=str, default=None, help="PRIORITY, default: config.ini's")
+    parser.add_argument("--limit", type=int, default=0, help="urls to crawl before stopping (0: all)")
+    args = parser.parse_args()
+
+    main(args)
@@ -0,0 +1,72 @@
+'''
+Downloads pages from the local stand-in cache server, once with a new
+connection per request (the old download) and once through the pooled
+Downloader, and checks retries of failing requests.
+    Run from the project root:
+        python -m benchmarks.download --urls 1000 --threads 4
+'''
+import time
+import cbor
+import requests
+from argparse import ArgumentParser
+from types import SimpleNamespace
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.download import Downloader
+from utils.response import Response
+from benchmarks.cache_server import CacheServer
+
+PAGE = b"<html><body>" + b"<p>cache server page</p>" * 200 + b"</body></html>"
+
+
+def unpooled_download(url, config):
+    # the previous utils.download.download: a fresh connection per url
+    host, port = config.cache_server
+    resp = requests.get(
+        f"http://{host}:{port}/",
+        params=[("q", f"{url}"), ("u", f"{config.user_agent}")])
+    return Response(cbor.loads(resp.content))
+
+
+def timed(fetch, urls, threads):
+    start = time.perf_counter()
+    with ThreadPoolExecutor(threads) as pool:
+        statuses = list(pool.map(fetch, urls))
+    assert all(resp.status == 200 and resp.raw_response.content == PAGE for resp in statuses)
+    return len(urls) / (time.perf_counter() - start)
+
+
+def main(count, threads):
+    failures = dict()   # url -> 5xx responses still to send
+
+    def pages(url):
+        if failures.get(url):
+            failures[url] -= 1
+            return 503, b""
+        return 200, PAGE
+
+    server = CacheServer(pages).start()
+    config = SimpleNamespace(
+        cache_server=server.address, user_agent="IR benchmark", max_in_flight=threads,
+        timeout=5, retries=3, retry_backoff=0.01)
+    urls = [f"https://www.ics.uci.edu/page/{i}" for i in range(count)]
+
+    print(f"new connection per url: {timed(lambda url: unpooled_download(url, config), urls, threads):,.0f} urls/sec")
+    downloader = Downloader(config)
+    print(f"pooled keep-alive:      {timed(downloader.download, urls, threads):,.0f} urls/sec")
+
+    failures["https://www.ics.uci.edu/flaky"] = 2
+    failures["https://www.ics.uci.edu/down"] = 10
+    flaky = downloader.download("https://www.ics.uci.edu/flaky")
+    down = downloader.download("https://www.ics.uci.edu/down")
+    print(f"retried 503 twice: status {flaky.status}; always 503: status {down.status}, {down.error}")
+    server.stop()
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser()
+    parser.add_argument("--urls", type=int, default=1000)
+    parser.add_argument("--threads", type=int, default=4)
+    args = parser.parse_args()
+
+    main(args.urls, args.threads)
@@ -0,0 +1,46 @@
+'''
+Compares how fast urls can be added to (and completed in) the Frontier with
+each persistence backend.
+    Run from the project root:
+        python -m benchmarks.frontier_persistence --urls 5000
+'''
+import os
+import time
+import tempfile
+from argparse import ArgumentParser
+from types import SimpleNamespace
+
+from crawler.frontier import Frontier
+
+
+def run(persistence, urls, directory):
+    config = SimpleNamespace(
+        save_file=os.path.join(directory, f"frontier.{persistence}"),
+        persistence=persistence, commit_events=512, commit_ms=200,
+        seed_urls=["https://www.ics.uci.edu"], time_delay=0.5, max_delay=60.0, latency_factor=1.0,
+        priority="depth,diversity,novelty,indegree")
+    frontier = Frontier(config, True)
+    start = time.perf_counter()
+    for url in urls:
+        frontier.add_url(url)
+    for url in urls:
+        frontier.mark_url_complete(url)
+    frontier.close()
+    elapsed = time.perf_counter() - start
+    return len(urls) / elapsed
+
+
+def main(count):
+    urls = [f"https://www.ics.uci.edu/page/{i}" for i in range(count)]
+    with tempfile.TemporaryDirectory() as directory:
+        for persistence in ("shelve", "log", "compact"):
+            rate = run(persistence, urls, directory)
+            print(f"{persistence:>6}: {rate:,.0f} urls/sec (add + complete)")
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser()
+    parser.add_argument("--urls", type=int, default=5000)
+    args = parser.parse_args()
+
+    main(args.urls)
@@ -0,0 +1,50 @@
+'''
+Saves a crawl of --urls urls (one in --pending still to be downloaded) with
+the "log" and "compact" frontier persistence, then times reopening each one
+and reading its pending urls, which is what a resume does.
+    Run from the project root:
+        python -m benchmarks.frontier_resume --urls 200000 --pending 10
+'''
+import os
+import time
+import tempfile
+from argparse import ArgumentParser
+from types import SimpleNamespace
+
+from utils import get_urlhash
+from crawler.persistence import STORES
+
+
+def main(count, pending_every):
+    directory = tempfile.mkdtemp()
+    for persistence in ("log", "compact"):
+        config = SimpleNamespace(
+            save_file=os.path.join(directory, f"frontier.{persistence}"),
+            persistence=persistence, commit_events=512, commit_ms=200)
+        store = STORES[persistence](config)
+        for i in range(count):
+            url = f"https://www.ics.uci.edu/page/{i}"
+            urlhash = get_urlhash(url)
+            store[urlhash] = (url, False)
+            if i % pending_every:
+                store[urlhash] = (url, True)
+        store.close()
+
+        start = time.perf_counter()
+        store = STORES[persistence](config)
+        pending = store.pending()
+        elapsed = time.perf_counter() - start
+        size = sum(os.path.getsize(config.save_file + suffix)
+                   for suffix in ("", ".log", ".seen") if os.path.exists(config.save_file + suffix))
+        print(f"{persistence:>7}: resume {elapsed:.2f}s, {len(store)} seen, "
+              f"{len(pending)} pending, {size / 2**20:.1f} MiB on disk")
+        store.close()
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser()
+    parser.add_argument("--urls", type=int, default=200000)
+    parser.add_argument("--pending", type=int, default=10)
+    args = parser.parse_args()
+
+    main(args.urls, args.pending)
@@ -0,0 +1,71 @@
+'''
+Times storing one more page once --pages pages are stored, with the old
+store_link (rewriting urls.json and inserting into the urlsSorted.json list)
+and with the PageStore.
+    Run from the project root:
+        python -m benchmarks.page_store --pages 1000 10000 50000
+'''
+import os
+import json
+import time
+import bisect
+import tempfile
+from argparse import ArgumentParser
+
+from utils.page_store import PageStore
+
+SAMPLES = 20
+
+
+def url(i):
+    return f"https://www.ics.uci.edu/~user{i % 997}/page{i}.html"
+
+
+def old_store_link(urls_file, sorted_urls_file, page_url, word_count):
+    # store_link before the PageStore
+    with open(urls_file, 'r') as file:
+        data = json.load(file)
+    with open(urls_file, 'w') as file:
+        data[page_url] = word_count
+        json.dump(data, file, indent=4)
+    with open(sorted_urls_file, 'r') as file:
+        urls = json.load(file)["urls"]
+    bisect.insort(urls, page_url)
+    with open(sorted_urls_file, 'w') as file:
+        json.dump({"urls": urls}, file, indent=4)
+
+
+def main(sizes):
+    for size in sizes:
+        directory = tempfile.mkdtemp()
+        urls_file = os.path.join(directory, "urls.json")
+        sorted_urls_file = os.path.join(directory, "urlsSorted.json")
+        pages = {url(i): i % 500 for i in range(size)}
+        with open(urls_file, 'w') as file:
+            json.dump(pages, file)
+        with open(sorted_urls_file, 'w') as file:
+            json.dump({"urls": sorted(pages)}, file)
+
+        start = time.perf_counter()
+        for i in range(size, size + SAMPLES):
+            old_store_link(urls_file, sorted_urls_file, url(i), 100)
+        old = (time.perf_counter() - start) / SAMPLES
+
+        store = PageStore(os.path.join(directory, "pages.log"), urls_file, sorted_urls_file)
+        len(store.sorted_urls)      # load (imports urls.json once)
+        start = time.perf_counter()
+        for i in range(size + SAMPLES, size + SAMPLES + 1000):
+            store.add(url(i), 100)
+        new = (time.perf_counter() - start) / 1000
+        store.flush(snapshot=True)
+
+        print(f"{size:>8} pages stored: store_link {old * 1000:8.2f} ms/page, "
+              f"PageStore {new * 1e6:6.1f} us/page")
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser()
+    parser.add_argument("--pages", type=int, nargs="+", default=[1000, 10000, 50000])
+    args = parser.parse_args()
+
+    main(args.pages)
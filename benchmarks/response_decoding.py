@@ -0,0 +1,68 @@
+'''
+Decodes synthetic cache server payloads the old way (cbor.loads, then
+unpickling every raw response) and with the lazy Response.from_cbor, which
+only unpickles pages that are actually read.
+    Run from the project root:
+        python -m benchmarks.response_decoding --payloads 2000 --ok 0.3
+'''
+import time
+import cbor
+import pickle
+import random
+from argparse import ArgumentParser
+
+from utils.response import Response
+from benchmarks.cache_server import raw_response
+
+PAGE = b"<html><body>" + b"<p>a page from the cache server</p>" * 3000 + b"</body></html>"
+
+
+def synthetic_payloads(count, ok_fraction):
+    random.seed(141)
+    payloads = list()
+    for i in range(count):
+        url = f"https://www.ics.uci.edu/page/{i}"
+        if random.random() < ok_fraction:
+            status = 200
+        else:
+            status = random.choice((301, 404, 500, 603))    # redirects, errors, cache errors
+        resp = {"url": url, "status": status}
+        if status < 600:
+            resp["response"] = pickle.dumps(raw_response(url, status, PAGE))
+        else:
+            resp["error"] = "Spacetime error"
+        payloads.append(cbor.dumps(resp))
+    return payloads
+
+
+def eager(payload):
+    resp = cbor.loads(payload)
+    raw = pickle.loads(resp["response"]) if "response" in resp else None
+    return resp["status"], raw
+
+
+def lazy(payload):
+    resp = Response.from_cbor(payload)
+    raw = resp.raw_response if resp.status == 200 else None     # like scraper(), only 200s are read
+    return resp.status, raw
+
+
+def main(count, ok_fraction):
+    payloads = synthetic_payloads(count, ok_fraction)
+    size = sum(len(payload) for payload in payloads) / 2**20
+    print(f"{count} payloads, {size:.0f} MiB, {ok_fraction:.0%} with status 200")
+    for name, decode in (("eager", eager), ("lazy", lazy)):
+        start = time.perf_counter()
+        for payload in payloads:
+            decode(payload)
+        elapsed = time.perf_counter() - start
+        print(f"{name:>5}: {elapsed:.3f}s, {count / elapsed:,.0f} responses/sec")
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser()
+    parser.add_argument("--payloads", type=int, default=2000)
+    parser.add_argument("--ok", type=float, default=0.3)
+    args = parser.parse_args()
+
+    main(args.payloads, args.ok)
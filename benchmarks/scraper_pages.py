@@ -0,0 +1,85 @@
+'''
+Runs scraper.scraper over a corpus of stored html pages and reports pages/sec.
+The scraper's data files are written to a temporary directory, not data/.
+    Run from the project root:
+        python -m benchmarks.scraper_pages --pages path/to/html/files
+    Without --pages a synthetic corpus is generated.
+'''
+import os
+import json
+import time
+import random
+import tempfile
+from argparse import ArgumentParser
+from types import SimpleNamespace
+
+import scraper
+
+WORDS = ("informatics", "research", "student", "faculty", "course", "lecture",
+         "machine", "learning", "graphics", "systems", "security", "seminar")
+
+
+def synthetic_page(page_id, links, paragraphs):
+    anchors = "".join(
+        f'<a href="/page/{random.randrange(100000)}#top">link</a> '
+        if i % 2 else
+        f'<a href="https://www.ics.uci.edu/~user{i}/page{page_id}.html">link</a> '
+        for i in range(links))
+    text = "".join(
+        f"<p>{' '.join(random.choice(WORDS) for _ in range(80))}</p>"
+        for _ in range(paragraphs))
+    return f"<html><head><title>Page {page_id}</title></head><body>{text}{anchors}</body></html>"
+
+
+def load_corpus(directory, count):
+    if directory:
+        pages = list()
+        for name in sorted(os.listdir(directory)):
+            with open(os.path.join(directory, name), 'rb') as file:
+                pages.append((f"https://www.ics.uci.edu/fixtures/{name}", file.read()))
+        return pages
+    random.seed(141)
+    return [(f"https://www.ics.uci.edu/page/{i}",
+             synthetic_page(i, 60, 20).encode("utf-8")) for i in range(count)]
+
+
+def as_response(url, content):
+    return SimpleNamespace(url=url, status=200, error=None,
+                           raw_response=SimpleNamespace(url=url, content=content))
+
+
+def main(directory, count):
+    corpus = load_corpus(directory, count)
+    responses = [as_response(url, content) for url, content in corpus]
+
+    # scraper stores into data/ relative to the working directory
+    workdir = tempfile.mkdtemp()
+    os.makedirs(os.path.join(workdir, "data"))
+    for name, empty in (("urls.json", {}), ("urlsSorted.json", {"urls": []})):
+        with open(os.path.join(workdir, "data", name), 'w') as file:
+            json.dump(empty, file)
+    os.chdir(workdir)
+
+    start = time.perf_counter()
+    for resp in responses:
+        document = scraper.parse_page(resp)
+        scraper.extract_next_links(resp.url, resp, document)
+        scraper.tokenize(document.text_content())
+    parse_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    links = sum(len(scraper.scraper(resp.url, resp)) for resp in responses)
+    scrape_time = time.perf_counter() - start
+
+    print(f"{len(responses)} pages, {links} links kept")
+    print(f"parse + links + tokenize: {len(responses) / parse_time:,.1f} pages/sec")
+    print(f"scraper.scraper (with storing): {len(responses) / scrape_time:,.1f} pages/sec")
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser()
+    parser.add_argument("--pages", type=str, default=None)
+    parser.add_argument("--count", type=int, default=300)
+    args = parser.parse_args()
+
+    main(args.pages, args.count)
@@ -0,0 +1,67 @@
+'''
+Compares scraper.tokenize with the previous findall + defaultdict tokenizer
+on small pages and on multi-megabyte documents.
+    Run from the project root:
+        python -m benchmarks.tokenizer --small-kb 10 --large-mb 4
+'''
+import re
+import time
+import random
+from argparse import ArgumentParser
+from collections import defaultdict
+
+import scraper
+
+WORDS = ("informatics", "Research", "student", "faculty", "course", "lecture",
+         "machine", "learning", "the", "and", "2023", "ICS", "café", "don't")
+
+
+def findall_tokenize(text):
+    # the tokenizer scraper used before
+    tokens = defaultdict(int)
+    for token in re.findall(r'[a-zA-Z0-9]+', text):
+        tokens[token.lower()] += 1
+    return (tokens, len(tokens))
+
+
+def document(size):
+    words = list()
+    length = 0
+    while length < size:
+        word = random.choice(WORDS) + random.choice(("", " ", ", ", ".\n"))
+        words.append(word)
+        length += len(word) + 1
+    return " ".join(words)
+
+
+def rate(tokenize, texts):
+    start = time.perf_counter()
+    for text in texts:
+        tokenize(text)
+    elapsed = time.perf_counter() - start
+    return sum(len(text) for text in texts) / elapsed / 2**20
+
+
+def main(small_kb, large_mb):
+    random.seed(0)
+    corpora = {
+        f"{small_kb} KB x 500": [document(small_kb * 1024) for _ in range(500)],
+        f"{large_mb} MB x 3": [document(large_mb * 2**20) for _ in range(3)],
+    }
+    tokenizers = {
+        "findall": findall_tokenize,
+        "tokenize": scraper.tokenize,
+        "tokenize + stopwords": lambda text: scraper.tokenize(text, scraper.STOPWORDS),
+    }
+    for corpus, texts in corpora.items():
+        for name, tokenize in tokenizers.items():
+            print(f"{corpus:>12} {name:>21}: {rate(tokenize, texts):,.1f} MB/sec")
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser()
+    parser.add_argument("--small-kb", type=int, default=10)
+    parser.add_argument("--large-mb", type=int, default=4)
+    args = parser.parse_args()
+
+    main(args.small_kb, args.large_mb)
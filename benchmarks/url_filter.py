@@ -0,0 +1,70 @@
+'''
+Times the scheme/host/extension checks of the previous is_valid against
+UrlFilter over the urls in data/urls.json (plus variants with other
+schemes, hosts and file extensions). The similarity check is left out of
+both, since it is the same for both.
+    Run from the project root:
+        python -m benchmarks.url_filter --repeat 20
+'''
+import re
+import json
+import time
+from argparse import ArgumentParser
+from urllib.parse import urlparse
+
+from utils.url_filter import UrlFilter
+
+
+def old_is_valid(url):
+    # the previous is_valid, without is_link_similar
+    try:
+        parsed = urlparse(url)
+        if parsed.scheme not in set(["http", "https"]):
+            return False
+        accepted_hostnames = {"ics.uci.edu", "cs.uci.edu", "informatics.uci.edu", "stat.uci.edu"}
+        if not any([parsed.hostname.endswith(hostname) for hostname in accepted_hostnames]):
+            return False
+        return not re.match(
+            r".*\.(css|js|bmp|gif|jpe?g|ico"
+            + r"|png|tiff?|mid|mp2|mp3|mp4"
+            + r"|wav|avi|mov|mpeg|ram|m4v|mkv|ogg|ogv|pdf"
+            + r"|ps|eps|tex|ppt|pptx|doc|docx|xls|xlsx|names"
+            + r"|data|dat|exe|bz2|tar|msi|bin|7z|psd|dmg|iso"
+            + r"|epub|dll|cnf|tgz|sha1"
+            + r"|thmx|mso|arff|rtf|jar|csv"
+            + r"|rm|smil|wmv|swf|wma|zip|rar|gz"
+            + r"|odc|ppsx|git|ps|bib"
+            + r")$", parsed.path.lower())
+    except AttributeError:
+        return False
+
+
+def main(repeat):
+    with open('data/urls.json', 'r') as file:
+        urls = list(json.load(file))
+    urls += [url + "/slides.PDF" for url in urls[::4]]
+    urls += [url.replace("https://", "mailto://") for url in urls[::7]]
+    urls += [url.replace(".uci.edu", ".example.com") for url in urls[::5]]
+    urls *= repeat
+
+    url_filter = UrlFilter(lambda url: False)
+    start = time.perf_counter()
+    old = [url for url in urls if old_is_valid(url)]
+    old_time = time.perf_counter() - start
+    start = time.perf_counter()
+    new = url_filter.filter_urls(urls)
+    new_time = time.perf_counter() - start
+
+    # the old host check also accepted hosts like physics.uci.edu ("...ics.uci.edu")
+    differ = set(old) ^ set(new)
+    print(f"{len(urls)} urls, {len(new)} kept, {len(differ)} decided differently")
+    print(f"old is_valid: {len(urls) / old_time:,.0f} urls/sec")
+    print(f"UrlFilter:    {len(urls) / new_time:,.0f} urls/sec ({old_time / new_time:.1f}x)")
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    main(args.repeat)
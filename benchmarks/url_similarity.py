@@ -0,0 +1,64 @@
+'''
+Compares is_link_similar's old per-call reload of data/urlsSorted.json
+against the in-memory SortedUrlIndex, and checks both make the same decisions.
+    Run from the project root:
+        python -m benchmarks.url_similarity
+'''
+import json
+import time
+import bisect
+from difflib import SequenceMatcher
+
+from utils.url_index import SortedUrlIndex
+
+SORTED_FILE = 'data/urlsSorted.json'
+
+
+def reload_is_link_similar(s):
+    # the previous implementation, which reloads the whole file on every call
+    tr = False
+    with open(SORTED_FILE, 'r') as file:
+        data = json.load(file)
+        idx = bisect.bisect(data["urls"], s)
+        try:
+            if len(data["urls"]) >= 3:
+                diff0 = SequenceMatcher(None, s, data["urls"][idx - 2]).ratio()
+                diff1 = SequenceMatcher(None, s, data["urls"][idx - 1]).ratio()
+                diff2 = SequenceMatcher(None, s, data["urls"][idx]).ratio()
+                diff3 = SequenceMatcher(None, s, data["urls"][idx + 1]).ratio()
+                if diff0 >= 0.95 and diff1 >= 0.95:
+                    tr = True
+                if diff2 >= 0.95 and diff3 >= 0.95:
+                    tr = True
+                if diff1 >= 0.95 and diff2 >= 0.95:
+                    tr = True
+        except IndexError:
+            pass
+    return tr
+
+
+def timed(check, urls):
+    start = time.perf_counter()
+    decisions = [check(url) for url in urls]
+    return decisions, time.perf_counter() - start
+
+
+def main():
+    with open('data/urls.json', 'r') as file:
+        urls = list(json.load(file))
+    urls += [url + "/index.html" for url in urls]   # unseen variants too
+
+    with open(SORTED_FILE, 'r') as file:
+        stored = json.load(file)["urls"]
+    index = SortedUrlIndex(lambda: stored)
+    old, old_time = timed(reload_is_link_similar, urls)
+    new, new_time = timed(index.is_similar, urls)
+
+    assert old == new, "decisions differ"
+    print(f"{len(urls)} urls against {len(index)} stored, {sum(new)} similar")
+    print(f"reload per call: {old_time:.3f}s")
+    print(f"in-memory index: {new_time:.3f}s ({old_time / new_time:.1f}x faster)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+'''
+Replays the urls of data/urls.json in crawl order through both near-duplicate
+checks (SequenceMatcher on sorted neighbours, and trap templates), storing
+each url that is accepted, and reports time and number of skipped urls.
+    Run from the project root:
+        python -m benchmarks.url_traps --threshold 50
+'''
+import json
+import time
+from argparse import ArgumentParser
+
+from utils.url_index import SortedUrlIndex
+from utils.url_traps import UrlTrapDetector
+
+
+def replay(urls, is_similar, add):
+    skipped = 0
+    start = time.perf_counter()
+    for url in urls:
+        if is_similar(url):
+            skipped += 1
+        else:
+            add(url)
+    return skipped, time.perf_counter() - start
+
+
+def main(threshold):
+    with open('data/urls.json', 'r') as file:
+        urls = list(json.load(file))
+
+    # both checks start from an empty store
+    index = SortedUrlIndex()
+    traps = UrlTrapDetector(threshold)
+
+    for name, check in (("sequence", index), ("template", traps)):
+        similar = check.is_similar if name == "sequence" else check.is_trap
+        skipped, elapsed = replay(urls, similar, check.add)
+        print(f"{name:>8}: {elapsed:.3f}s, {len(urls) / elapsed:,.0f} urls/sec, "
+              f"skipped {skipped} of {len(urls)}")
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser()
+    parser.add_argument("--threshold", type=int, default=50)
+    args = parser.parse_args()
+
+    main(args.threshold)
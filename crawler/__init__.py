@@ -1,16 +1,27 @@
+import scraper
 from utils import get_logger
 from crawler.frontier import Frontier
-from crawler.worker import Worker
+from crawler.worker import Worker, shutdown_parse_pool
+from utils.metrics import StatsReporter, MetricsServer
 
 class Crawler(object):
     def __init__(self, config, restart, frontier_factory=Frontier, worker_factory=Worker):
         self.config = config
         self.logger = get_logger("CRAWLER")
+        scraper.configure(config)
         self.frontier = frontier_factory(config, restart)
         self.workers = list()
         self.worker_factory = worker_factory
+        self.reporters = list()
 
     def start_async(self):
+        if self.config.stats_interval > 0:
+            self.reporters.append(StatsReporter(self.config.stats_interval))
+        if self.config.stats_port:
+            self.reporters.append(MetricsServer(self.config.stats_port))
+            self.logger.info(f"Serving crawl metrics on http://127.0.0.1:{self.config.stats_port}/")
+        for reporter in self.reporters:
+            reporter.start()
         self.workers = [
             self.worker_factory(worker_id, self.config, self.frontier)
             for worker_id in range(self.config.threads_count)]
@@ -24,3 +35,7 @@ class Crawler(object):
     def join(self):
         for worker in self.workers:
             worker.join()
+        shutdown_parse_pool()   # only started by PoolWorkers
+        for reporter in self.reporters:
+            reporter.stop()
+        self.frontier.close()
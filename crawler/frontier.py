@@ -1,18 +1,32 @@
 import os
-import shelve
+import heapq
 
-from threading import Thread, RLock
+from threading import Thread, RLock, Condition
 from queue import Queue, Empty
 
 from utils import get_logger, get_urlhash, normalize
-from scraper import is_valid
+from scraper import filter_urls, robots
+from crawler.scheduler import HostScheduler, get_host
+from crawler.rate_control import HostRateController
+from crawler.priority import make_policy
+from crawler.persistence import open_store, remove_store
+from utils.metrics import metrics
 
 class Frontier(object):
+    idle_poll = None    # seconds between checks of _crawl_done while nothing is queued
+
     def __init__(self, config, restart):
         self.logger = get_logger("FRONTIER")
         self.config = config
-        self.to_be_downloaded = list()
-        
+        # urls waiting to be downloaded, grouped per host for politeness, best scored first
+        self.to_be_downloaded = HostScheduler(self.config.time_delay, make_policy(self.config.priority))
+        # per host delays, POLITENESS or longer for slow, failing or empty hosts
+        self.rate_control = HostRateController(
+            self.config.time_delay, self.config.max_delay, self.config.latency_factor)
+        self.lock = RLock()
+        self.has_work = Condition(self.lock)
+        self.in_progress = 0    # urls handed to workers but not yet marked complete
+
         if not os.path.exists(self.config.save_file) and not restart:
             # Save file does not exist, but request to load save.
             self.logger.info(
@@ -22,9 +36,9 @@ class Frontier(object):
             # Save file does exists, but request to start from seed.
             self.logger.info(
                 f"Found save file {self.config.save_file}, deleting it.")
-            os.remove(self.config.save_file)
+            remove_store(self.config)
         # Load existing save file, or create one if it does not exist.
-        self.save = shelve.open(self.config.save_file)
+        self.save = open_store(self.config)
         if restart:
             for url in self.config.seed_urls:
                 self.add_url(url)
@@ -34,39 +48,102 @@ class Frontier(object):
             if not self.save:
                 for url in self.config.seed_urls:
                     self.add_url(url)
+        metrics.gauge("frontier", self.stats)
 
     def _parse_save_file(self):
         ''' This function can be overridden for alternate saving techniques. '''
         total_count = len(self.save)
         tbd_count = 0
-        for url, completed in self.save.values():
-            if not completed and is_valid(url):
-                self.to_be_downloaded.append(url)
-                tbd_count += 1
+        for url in filter_urls(self.save.pending()):
+            self.to_be_downloaded.push(url)
+            tbd_count += 1
         self.logger.info(
             f"Found {tbd_count} urls to be downloaded from {total_count} "
             f"total urls discovered.")
 
     def get_tbd_url(self):
-        try:
-            return self.to_be_downloaded.pop()
-        except IndexError:
-            return None
+        ''' Blocks until some host may politely be fetched again. Returns None
+        only when nothing is queued and no worker can add more urls. '''
+        with self.has_work:
+            while True:
+                url, wait = self.to_be_downloaded.pop()
+                if url:
+                    self.in_progress += 1
+                    return url
+                if wait is None and self._crawl_done():
+                    self.has_work.notify_all()  # wake the other workers so they stop too
+                    return None
+                self.has_work.wait(wait if wait is not None else self.idle_poll)
+
+    def _crawl_done(self):
+        ''' True once no worker can add more urls. '''
+        return not self.in_progress
 
-    def add_url(self, url):
+    def add_url(self, url, parent=None, depth=None):
+        ''' Returns True if the url had not been seen before. `depth` is its
+        link depth from the seeds, by default one more than its `parent`
+        page's (the url it was found on). '''
         url = normalize(url)
         urlhash = get_urlhash(url)
-        if urlhash not in self.save:
-            self.save[urlhash] = (url, False)
-            self.save.sync()
-            self.to_be_downloaded.append(url)
-    
+        with self.has_work:
+            if urlhash not in self.save:
+                if depth is None:
+                    depth = self.to_be_downloaded.link_depth(parent)
+                self.save[urlhash] = (url, False)
+                self.to_be_downloaded.push(url, depth)
+                self.has_work.notify()
+                return True
+            self.to_be_downloaded.link(url)     # one more page links to it, if still waiting
+            return False
+
+    def add_urls(self, urls, depth=None):
+        ''' Adds urls in bulk (one lock for all), returns how many were new. '''
+        with self.has_work:
+            return sum(self.add_url(url, depth=depth) for url in urls)
+
+    def observe(self, url, status, productive, latency):
+        ''' Records how the download of url went, for the delay of its host
+        (see HostRateController.observe). '''
+        with self.lock:
+            self.rate_control.observe(get_host(url), status, productive, latency)
+
     def mark_url_complete(self, url):
         urlhash = get_urlhash(url)
-        if urlhash not in self.save:
-            # This should not happen.
-            self.logger.error(
-                f"Completed url {url}, but have not seen it before.")
+        with self.has_work:
+            if urlhash not in self.save:
+                # This should not happen.
+                self.logger.error(
+                    f"Completed url {url}, but have not seen it before.")
+
+            self.save[urlhash] = (url, True)
+            # starts the politeness delay of the url's host, at least its robots.txt Crawl-delay
+            self.to_be_downloaded.release(
+                url, self.rate_control.delay(get_host(url), robots.crawl_delay(url)))
+            self.in_progress = max(self.in_progress - 1, 0)
+            self.has_work.notify_all()
+
+    def defer_url(self, url):
+        ''' Puts url back in its host's queue instead of marking it complete,
+        e.g. when its worker downloaded the host's robots.txt in its place.
+        The host's delay starts as in mark_url_complete, or lasts until its
+        robots.txt is tried again if it could not be downloaded. '''
+        with self.has_work:
+            delay = self.rate_control.delay(get_host(url), robots.crawl_delay(url))
+            self.to_be_downloaded.defer(url, max(delay, robots.unreachable_for(url)))
+            self.in_progress = max(self.in_progress - 1, 0)
+            self.has_work.notify_all()
+
+    def stats(self):
+        ''' Queue sizes for the crawl metrics, with the 10 deepest host queues. '''
+        with self.lock:
+            depths = self.to_be_downloaded.queue_depths()
+            return {
+                "queued": sum(depths.values()),
+                "in_progress": self.in_progress,
+                "hosts": len(depths),
+                "backed_off_hosts": self.rate_control.backed_off()[:10],
+                "host_queue_depth": dict(heapq.nlargest(10, depths.items(), key=lambda item: item[1]))}
 
-        self.save[urlhash] = (url, True)
-        self.save.sync()
+    def close(self):
+        with self.has_work:
+            self.save.close()
@@ -0,0 +1,250 @@
+import os
+import time
+import atexit
+import shelve
+import struct
+
+from threading import Thread, RLock, Event
+
+from utils import get_urlhash
+from utils.digest_set import DigestSet
+from utils.metrics import metrics
+
+
+class ShelveStore(shelve.DbfilenameShelf):
+    ''' The original frontier save: a shelve that is synced after every change. '''
+
+    def __init__(self, config):
+        super().__init__(config.save_file)
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        with metrics.time("frontier_sync"):
+            self.sync()
+
+    def pending(self):
+        return [url for url, completed in self.values() if not completed]
+
+
+# Log record: 1 byte event, 4 byte url length, utf-8 url.
+RECORD = struct.Struct("<BI")
+DISCOVERED = 0
+COMPLETED = 1
+
+
+class LogStore(object):
+    ''' Frontier save kept as a snapshot plus an append-only event log.
+
+    Events are buffered and group committed (one write and fsync) every
+    `commit_events` events or `commit_ms` milliseconds, whichever comes first.
+    Once the log holds more records than the snapshot it is compacted into a
+    new snapshot. On startup the snapshot and then the log are replayed; a
+    record torn by a crash is dropped. Buffered events are also committed
+    at exit. Behaves like the shelve mapping of urlhash -> (url, completed)
+    that the Frontier expects. '''
+
+    def __init__(self, config):
+        self.snapshot_file = config.save_file
+        self.log_file = f"{config.save_file}.log"
+        self.commit_events = config.commit_events
+        self.commit_interval = config.commit_ms / 1000
+        self.urls = dict()      # urlhash -> (url, completed)
+        self.buffered = list()  # encoded records not yet committed
+        self.log_records = 0    # records in the log since the last snapshot
+        self.last_commit = time.monotonic()
+        self.lock = RLock()
+
+        self._replay(self.snapshot_file)
+        self.log_records = self._replay(self.log_file)
+        if not os.path.exists(self.snapshot_file):
+            self._write_snapshot()
+        self.log = open(self.log_file, "ab")
+
+        self.closed = Event()
+        self.committer = Thread(target=self._commit_loop, daemon=True)
+        self.committer.start()
+        atexit.register(self.commit)    # e.g. Ctrl-C, which skips Frontier.close
+
+    def _replay(self, filename):
+        ''' Applies the records of filename, truncating a torn last record. '''
+        if not os.path.exists(filename):
+            return 0
+        count = 0
+        with open(filename, "r+b") as file:
+            data = file.read()
+            offset = 0
+            while offset + RECORD.size <= len(data):
+                event, length = RECORD.unpack_from(data, offset)
+                end = offset + RECORD.size + length
+                if end > len(data):
+                    break
+                url = data[offset + RECORD.size:end].decode("utf-8")
+                self._apply(event, url)
+                offset = end
+                count += 1
+            if offset != len(data):
+                file.truncate(offset)
+        return count
+
+    def _apply(self, event, url):
+        urlhash = get_urlhash(url)
+        if event == COMPLETED:
+            self._remember(urlhash, url, True)
+        elif urlhash not in self.urls:
+            self._remember(urlhash, url, False)
+
+    def _remember(self, urlhash, url, completed):
+        self.urls[urlhash] = (url, completed)
+
+    def __contains__(self, urlhash):
+        return urlhash in self.urls
+
+    def __len__(self):
+        return len(self.urls)
+
+    def __getitem__(self, urlhash):
+        return self.urls[urlhash]
+
+    def values(self):
+        return list(self.urls.values())
+
+    def pending(self):
+        ''' Urls discovered but not completed yet. '''
+        return [url for url, completed in self.urls.values() if not completed]
+
+    def __setitem__(self, urlhash, value):
+        url, completed = value
+        encoded = url.encode("utf-8")
+        with self.lock:
+            self._remember(urlhash, url, completed)
+            self.buffered.append(
+                RECORD.pack(COMPLETED if completed else DISCOVERED, len(encoded)))
+            self.buffered.append(encoded)
+            if (len(self.buffered) // 2 >= self.commit_events
+                    or time.monotonic() - self.last_commit >= self.commit_interval):
+                self.commit()
+
+    def sync(self):
+        self.commit()
+
+    def commit(self):
+        ''' Writes all buffered events to the log with a single fsync. '''
+        with self.lock:
+            self.last_commit = time.monotonic()
+            if not self.buffered:
+                return
+            with metrics.time("frontier_sync"):
+                self.log.write(b"".join(self.buffered))
+                self.log.flush()
+                os.fsync(self.log.fileno())
+            self.log_records += len(self.buffered) // 2
+            self.buffered.clear()
+            if self.log_records > len(self.urls):
+                self.compact()
+
+    def compact(self):
+        ''' Folds the log into a fresh snapshot and empties the log. '''
+        with self.lock:
+            self._write_snapshot()
+            self.log.truncate(0)
+            self.log.seek(0)
+            self.log_records = 0
+
+    def _write_snapshot(self):
+        records = list()
+        for url, completed in self.urls.values():
+            encoded = url.encode("utf-8")
+            records.append(
+                RECORD.pack(COMPLETED if completed else DISCOVERED, len(encoded)))
+            records.append(encoded)
+        tmp_file = f"{self.snapshot_file}.tmp"
+        with open(tmp_file, "wb") as file:
+            file.write(b"".join(records))
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tmp_file, self.snapshot_file)
+
+    def _commit_loop(self):
+        # commits events that were buffered while the crawl was idle
+        while not self.closed.wait(self.commit_interval):
+            if time.monotonic() - self.last_commit >= self.commit_interval:
+                self.commit()
+
+    def close(self):
+        self.closed.set()
+        atexit.unregister(self.commit)
+        with self.lock:
+            self.commit()
+            self.log.close()
+
+
+class CompactStore(LogStore):
+    ''' Frontier save for large crawls: every url seen is a 16 byte digest
+    in an mmap'd DigestSet (`save_file`.seen), and the snapshot plus log
+    only track the urls still to be downloaded. Resuming costs O(pending
+    urls) instead of O(urls ever seen).
+
+    A digest only goes into the DigestSet once the log record of its url is
+    fsync'd: a url marked seen on disk is always in the snapshot or log too,
+    so a crash never loses a url that was still to be downloaded. '''
+
+    def __init__(self, config):
+        self.seen = DigestSet(f"{config.save_file}.seen")
+        self.new_digests = set()    # digests of urls whose records are not committed yet
+        super().__init__(config)
+        with self.lock:
+            self._store_digests()   # the replayed records are already on disk
+
+    def _remember(self, urlhash, url, completed):
+        digest = bytes.fromhex(urlhash)[:16]
+        if digest not in self.seen:
+            self.new_digests.add(digest)
+        if completed:
+            self.urls.pop(urlhash, None)
+        else:
+            self.urls[urlhash] = (url, completed)
+
+    def _store_digests(self):
+        for digest in self.new_digests:
+            self.seen.add(digest)
+        self.new_digests.clear()
+        self.seen.flush()
+
+    def __contains__(self, urlhash):
+        digest = bytes.fromhex(urlhash)[:16]
+        return digest in self.new_digests or digest in self.seen
+
+    def __len__(self):
+        return len(self.seen) + len(self.new_digests)
+
+    def __getitem__(self, urlhash):
+        # only pending urls are kept, everything else seen is completed
+        return self.urls[urlhash]
+
+    def commit(self):
+        with self.lock:
+            super().commit()
+            self._store_digests()
+
+    def compact(self):
+        with self.lock:
+            # completed urls leave the log here, their digests must be on disk first
+            self._store_digests()
+            super().compact()
+
+    def close(self):
+        super().close()
+        self.seen.close()
+
+
+STORES = {"shelve": ShelveStore, "log": LogStore, "compact": CompactStore}
+
+
+def open_store(config):
+    return STORES[config.persistence](config)
+
+
+def remove_store(config):
+    for filename in (config.save_file, f"{config.save_file}.log", f"{config.save_file}.seen"):
+        if os.path.exists(filename):
+            os.remove(filename)
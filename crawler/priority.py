@@ -0,0 +1,77 @@
+import math
+
+from utils.url_traps import url_template
+
+# Parts of the ScorePolicy and their default weights, see make_policy.
+COMPONENTS = ("depth", "diversity", "novelty", "indegree")
+
+
+class FifoPolicy(object):
+    ''' Every url scores the same: each host's urls are fetched in the order
+    they were found, and hosts take turns by their oldest waiting url. '''
+
+    def pattern(self, url):
+        return None
+
+    def url_score(self, depth, links, pattern):
+        return 0
+
+    def host_score(self, host):
+        return 0
+
+    def fetched(self, host, pattern):
+        pass
+
+
+class ScorePolicy(object):
+    ''' Scores urls for the HostScheduler, lower is fetched first:
+
+        depth     * link depth from the seeds (breadth first)
+      + novelty   * log2(1 + urls fetched with the same template)
+      - indegree  * log2(pages found linking to the url)
+
+    and adds diversity * log2(1 + urls fetched from the host) to the
+    score of the host's best url when picking between hosts that may be
+    fetched. Fetching a url makes the other urls of its template and host
+    score worse; the scheduler re-scores them lazily when they come up. '''
+
+    def __init__(self, depth=1.0, diversity=1.0, novelty=1.0, indegree=1.0):
+        self.depth = depth
+        self.diversity = diversity
+        self.novelty = novelty
+        self.indegree = indegree
+        self.templates = dict()     # template -> urls fetched with it
+        self.hosts = dict()         # host -> urls fetched from it
+
+    def pattern(self, url):
+        return url_template(url) if self.novelty else None
+
+    def url_score(self, depth, links, pattern):
+        score = self.depth * depth - self.indegree * math.log2(links)
+        if pattern is not None:
+            score += self.novelty * math.log2(1 + self.templates.get(pattern, 0))
+        return score
+
+    def host_score(self, host):
+        return self.diversity * math.log2(1 + self.hosts.get(host, 0))
+
+    def fetched(self, host, pattern):
+        self.hosts[host] = self.hosts.get(host, 0) + 1
+        if pattern is not None:
+            self.templates[pattern] = self.templates.get(pattern, 0) + 1
+
+
+def make_policy(spec):
+    ''' The policy for the PRIORITY setting: "fifo", or a comma separated
+    list of ScorePolicy components, each optionally with a weight, e.g.
+    "depth,novelty:2". Components not listed get weight 0. '''
+    spec = spec.strip().lower()
+    if spec in ("", "fifo"):
+        return FifoPolicy()
+    weights = dict.fromkeys(COMPONENTS, 0.0)
+    for part in spec.split(","):
+        name, _, weight = part.strip().partition(":")
+        if name not in weights:
+            raise ValueError(f"Unknown PRIORITY component {name!r}, expected one of {', '.join(COMPONENTS)}.")
+        weights[name] = float(weight) if weight else 1.0
+    return ScorePolicy(**weights)
@@ -0,0 +1,66 @@
+class HostStats(object):
+    __slots__ = ("latency", "failures", "unproductive", "pages")
+
+    def __init__(self):
+        self.latency = 0.0      # smoothed seconds per download
+        self.failures = 0       # 5xx or failed downloads in a row
+        self.unproductive = 0   # 4xx or no-content pages in a row
+        self.pages = 0
+
+
+class HostRateController(object):
+    ''' Picks the delay between two fetches of a host from how it responded.
+
+    The delay is `latency_factor` times the host's smoothed download time,
+    never less than `floor` (POLITENESS). It doubles for every 5xx response
+    or failed download in a row, and for each of the last (up to 4) 4xx or
+    no-content pages in a row, so failing and empty hosts wait longer and
+    the ready hosts that return pages are crawled first. A good page resets
+    the backoff. Delays are capped at `max_delay` (but not below the floor).
+    This class is not thread safe on its own, the Frontier locks around it. '''
+
+    def __init__(self, floor, max_delay=60.0, latency_factor=1.0, smoothing=0.3):
+        self.floor = floor
+        self.max_delay = max_delay
+        self.latency_factor = latency_factor
+        self.smoothing = smoothing
+        self.hosts = dict()     # host -> HostStats
+
+    def observe(self, host, status, productive, latency):
+        ''' Records one download from host: its status (None if it failed),
+        whether it was a page with content (None for downloads that are not
+        pages, like robots.txt, which leave the 4xx/no-content streak as it
+        is), and how many seconds the server took to answer (None if unknown). '''
+        stats = self.hosts.get(host)
+        if stats is None:
+            stats = self.hosts[host] = HostStats()
+            stats.latency = latency or 0.0
+        elif latency is not None:
+            stats.latency += self.smoothing * (latency - stats.latency)
+        stats.pages += 1
+
+        if status is None or status >= 500:     # timeout, connection error or server error
+            stats.failures += 1
+            return
+        stats.failures = 0
+        if productive is None:
+            return
+        if productive:
+            stats.unproductive = 0
+        else:                       # 4xx, 204, redirects and empty pages
+            stats.unproductive += 1
+
+    def delay(self, host, crawl_delay=0.0):
+        ''' Seconds to wait after a fetch of host before the next one, never
+        less than the host's robots.txt `crawl_delay`. '''
+        floor = max(self.floor, crawl_delay)
+        stats = self.hosts.get(host)
+        if stats is None:
+            return floor
+        delay = max(floor, self.latency_factor * stats.latency)
+        delay *= 2 ** min(stats.failures + min(stats.unproductive, 4), 16)
+        return max(floor, min(delay, self.max_delay))
+
+    def backed_off(self):
+        ''' Hosts currently waiting longer because of errors or empty pages. '''
+        return sorted(host for host, stats in self.hosts.items() if stats.failures or stats.unproductive)
@@ -0,0 +1,182 @@
+import time
+import heapq
+import itertools
+
+from urllib.parse import urlparse
+
+from crawler.priority import FifoPolicy
+
+# Fields of a queued url entry, kept as a list so the heap compares (score, order);
+# every entry gets its own order, so comparisons never reach URL.
+SCORE, ORDER, URL, DEPTH, LINKS, PATTERN = range(6)
+
+
+def get_host(url):
+    return urlparse(url).hostname or ""
+
+
+class HostScheduler(object):
+    ''' Per-host url queues ordered by priority, and hosts ordered by the
+    next time each may be fetched.
+
+    A host is handed to at most one worker at a time. Once the worker releases
+    it, the host becomes fetchable again after `delay` seconds, so politeness
+    is kept per host while different hosts are crawled concurrently. Each
+    host's urls are a heap ordered by the `policy`'s score; of the hosts that
+    may be fetched now, the one whose best url scores best goes first.
+
+    Scores only get worse as urls are fetched (a template or host becomes
+    less novel), so they are re-scored lazily: an entry at the top of a heap
+    is re-scored and pushed back down if it got worse, instead of re-scoring
+    every queued url. A url scoring better (one more page links to it) gets a
+    new entry and the old one is skipped when it comes up. Every operation is
+    O(log n). This class is not thread safe on its own, the Frontier locks
+    around it. '''
+
+    def __init__(self, delay, policy=None):
+        self.delay = delay
+        self.policy = policy if policy is not None else FifoPolicy()
+        self.queues = dict()        # host -> heap of entries of urls waiting to be fetched
+        self.sizes = dict()         # host -> number of urls waiting (its heap may also hold replaced entries)
+        self.entries = dict()       # url -> its current entry, while waiting
+        self.in_flight = dict()     # url -> depth, while being fetched
+        self.next_fetch = dict()    # host -> earliest time.monotonic() it may be fetched again
+        self.ready = list()         # heap of (next fetch time, host) for idle hosts with urls
+        self.scheduled = set()      # hosts currently in ready
+        self.due = list()           # heap of ((score, order), host) for idle hosts with urls that may be fetched now
+        self.due_priority = dict()  # host -> its current priority in due, other entries for it are stale
+        self.checked_out = set()    # hosts currently being fetched by a worker
+        self.order = itertools.count()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def queue_depths(self):
+        ''' host -> number of urls waiting, for hosts with urls waiting. '''
+        return dict(self.sizes)
+
+    def link_depth(self, parent):
+        ''' Depth of a url found on the page of `parent` (0 without one). '''
+        if parent is None:
+            return 0
+        return self.in_flight.get(parent, 0) + 1
+
+    def push(self, url, depth=0):
+        host = get_host(url)
+        pattern = self.policy.pattern(url)
+        entry = [self.policy.url_score(depth, 1, pattern), next(self.order), url, depth, 1, pattern]
+        heapq.heappush(self.queues.setdefault(host, list()), entry)
+        self.sizes[host] = self.sizes.get(host, 0) + 1
+        self.entries[url] = entry
+        self._reprioritize(host)
+
+    def link(self, url):
+        ''' Counts one more link to url, if it is waiting. '''
+        entry = self.entries.get(url)
+        if entry is None:
+            return
+        entry[LINKS] += 1
+        score = self.policy.url_score(entry[DEPTH], entry[LINKS], entry[PATTERN])
+        if score >= entry[SCORE]:
+            return
+        host = get_host(url)
+        # a fresh order: entries never tie on (score, order), so the heap
+        # never compares the URL of the stale entry (None) with a url
+        replacement = [score, next(self.order)] + entry[URL:]
+        entry[URL] = None       # skipped when it reaches the top of the heap
+        self.entries[url] = replacement
+        heapq.heappush(self.queues[host], replacement)
+        self._reprioritize(host)
+
+    def pop(self):
+        ''' Returns (url, None) if some host may be fetched now, otherwise
+        (None, seconds until the next host is ready), or (None, None) if
+        there is nothing scheduled at all. '''
+        now = time.monotonic()
+        while self.ready and self.ready[0][0] <= now:
+            _, host = heapq.heappop(self.ready)
+            self.scheduled.discard(host)
+            self._make_due(host)
+        while self.due:
+            priority, host = self.due[0]
+            if self.due_priority.get(host) != priority:
+                heapq.heappop(self.due)     # replaced by a better priority
+                continue
+            current = self._priority(host)
+            if current > priority:          # got worse since it was pushed
+                self.due_priority[host] = current
+                heapq.heapreplace(self.due, (current, host))
+                continue
+            heapq.heappop(self.due)
+            del self.due_priority[host]
+            break
+        else:
+            if not self.ready:
+                return None, None
+            return None, self.ready[0][0] - now
+
+        entry = heapq.heappop(self.queues[host])    # _priority left the current best on top
+        url = entry[URL]
+        del self.entries[url]
+        self.sizes[host] -= 1
+        if not self.sizes[host]:
+            del self.queues[host]
+            del self.sizes[host]
+        self.in_flight[url] = entry[DEPTH]
+        self.checked_out.add(host)
+        self.policy.fetched(host, entry[PATTERN])
+        return url, None
+
+    def release(self, url, delay=None):
+        ''' Marks the fetch of url as finished, starting its host's delay
+        (`delay` seconds if given, e.g. by a HostRateController). '''
+        self.in_flight.pop(url, None)
+        host = get_host(url)
+        if host not in self.checked_out:
+            return
+        self.checked_out.discard(host)
+        self.next_fetch[host] = time.monotonic() + (self.delay if delay is None else delay)
+        self._schedule(host)
+
+    def defer(self, url, delay=None):
+        ''' Releases url's host like release, and queues url again with the
+        same depth, for a fetch that had to wait for something else of its
+        host (its robots.txt). '''
+        depth = self.in_flight.get(url, 0)
+        self.push(url, depth)       # its host is still checked out, so not scheduled yet
+        self.release(url, delay)
+
+    def _priority(self, host):
+        ''' (the host's score plus its best url's, that url's order), re-scoring
+        the top of the host's heap. Equal scores go oldest url first. '''
+        queue = self.queues[host]
+        while True:
+            entry = queue[0]
+            if entry[URL] is None:
+                heapq.heappop(queue)
+                continue
+            score = self.policy.url_score(entry[DEPTH], entry[LINKS], entry[PATTERN])
+            if score <= entry[SCORE]:
+                break
+            entry[SCORE] = score
+            heapq.heapreplace(queue, entry)
+        return entry[SCORE] + self.policy.host_score(host), entry[ORDER]
+
+    def _make_due(self, host):
+        priority = self._priority(host)
+        current = self.due_priority.get(host)
+        if current is None or priority < current:
+            self.due_priority[host] = priority
+            heapq.heappush(self.due, (priority, host))
+
+    def _reprioritize(self, host):
+        if host in self.due_priority:
+            self._make_due(host)
+        else:
+            self._schedule(host)
+
+    def _schedule(self, host):
+        if host in self.scheduled or host in self.checked_out or host not in self.queues:
+            return
+        heapq.heappush(self.ready, (self.next_fetch.get(host, 0), host))
+        self.scheduled.add(host)
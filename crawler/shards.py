@@ -0,0 +1,217 @@
+import os
+import re
+import shutil
+import zlib
+import multiprocessing
+import multiprocessing.connection
+
+from array import array
+from threading import Thread
+from functools import partial
+
+import scraper
+from utils import get_logger, normalize
+from utils.token_index import TokenIndex
+from utils.page_store import read_pages, write_log, write_json
+from crawler import Crawler
+from crawler.frontier import Frontier
+from crawler.worker import Worker
+from crawler.scheduler import get_host
+
+
+def shard_of(url, shards):
+    ''' The process that owns the url's host (stable across processes, unlike hash()). '''
+    return zlib.crc32(get_host(url).encode("utf-8")) % shards
+
+
+class ShardFrontier(Frontier):
+    ''' Frontier of one process in a sharded crawl. It only queues urls of
+    the hosts it owns and sends every other url to its owner's inbox, so a
+    host is only ever fetched by one process and politeness still holds.
+
+    `outstanding` is shared by all processes and counts urls queued or in
+    progress anywhere, urls sent but not yet received, and one startup token
+    per process. The crawl is over when it drops to 0. '''
+
+    idle_poll = 0.2
+
+    def __init__(self, shard, shards, inboxes, outstanding, config, restart):
+        self.shard = shard
+        self.shards = shards
+        self.inboxes = inboxes
+        self.outstanding = outstanding
+        super().__init__(config, restart)
+        self.receiver = Thread(target=self._receive, daemon=True)
+        self.receiver.start()
+        self._count(-1)     # done loading, release this process's startup token
+
+    def _count(self, change):
+        with self.outstanding.get_lock():
+            self.outstanding.value += change
+
+    def _crawl_done(self):
+        return self.outstanding.value == 0
+
+    def _parse_save_file(self):
+        queued = len(self.to_be_downloaded)
+        super()._parse_save_file()
+        self._count(len(self.to_be_downloaded) - queued)
+
+    def add_url(self, url, parent=None, depth=None):
+        url = normalize(url)
+        owner = shard_of(url, self.shards)
+        if owner != self.shard:
+            if depth is None:
+                with self.lock:
+                    depth = self.to_be_downloaded.link_depth(parent)
+            self._count(1)
+            self.inboxes[owner].put((url, depth))
+            return False
+        if super().add_url(url, parent, depth):
+            self._count(1)
+            return True
+        return False
+
+    def mark_url_complete(self, url):
+        super().mark_url_complete(url)
+        self._count(-1)
+
+    def _receive(self):
+        inbox = self.inboxes[self.shard]
+        while True:
+            item = inbox.get()
+            if item is None:
+                return
+            url, depth = item
+            self.add_url(url, depth=depth)
+            self._count(-1)
+            with self.has_work:
+                self.has_work.notify_all()
+
+    def close(self):
+        self.inboxes[self.shard].put(None)
+        self.receiver.join()
+        super().close()
+
+
+def shards_on_disk(config):
+    ''' Number of shards (the highest shard plus one) whose data folders are
+    in config's data folder, left by an earlier sharded crawl. '''
+    if not os.path.isdir(config.data_dir):
+        return 0
+    shards = [int(name[len("shard"):]) for name in os.listdir(config.data_dir)
+              if re.fullmatch(r"shard\d+", name) and os.path.isdir(os.path.join(config.data_dir, name))]
+    return max(shards) + 1 if shards else 0
+
+
+def shard_save_files(config, shards):
+    ''' The frontier save files of the processes of a sharded crawl. '''
+    return [config.for_shard(shard).save_file for shard in range(shards)]
+
+
+def prepare_shard_data(config, shard_config, shard, shards):
+    ''' Starts the shard's data folder from the pages already stored for its
+    hosts, so trap and similarity checks continue where the last crawl ended.
+    Overwrites the shard's data, merge_shards it into config's first. '''
+    os.makedirs(shard_config.data_dir, exist_ok=True)
+    shutil.rmtree(shard_config.token_index_dir, ignore_errors=True)
+    pages = read_pages(config.pages_log, config.urls_file)
+    pages = {url: word_count for url, word_count in pages.items() if shard_of(url, shards) == shard}
+    write_log(pages, shard_config.pages_log)
+    write_json(pages, shard_config.urls_file, shard_config.sorted_urls_file)
+    if os.path.exists(config.fingerprints_file):
+        shutil.copyfile(config.fingerprints_file, shard_config.fingerprints_file)
+    elif os.path.exists(shard_config.fingerprints_file):
+        os.remove(shard_config.fingerprints_file)
+
+
+def run_shard(shard, shards, config, restart, inboxes, outstanding, worker_factory):
+    shard_config = config.for_shard(shard)
+    crawler = Crawler(
+        shard_config, restart,
+        frontier_factory=partial(ShardFrontier, shard, shards, inboxes, outstanding),
+        worker_factory=worker_factory)
+    crawler.start()
+    # processes end without running atexit, so flush the scraper's data here
+    scraper.page_store.flush(snapshot=True)
+    scraper.token_index.close()
+    scraper.page_fingerprints.close()
+
+
+def merge_shards(config, shards):
+    ''' Merges the data stored by each process into config's data folder. '''
+    shard_configs = [config.for_shard(shard) for shard in range(shards)]
+
+    # every shard started with the pages of its hosts, so this is their union
+    pages = read_pages(config.pages_log, config.urls_file)
+    for shard_config in shard_configs:
+        pages.update(read_pages(shard_config.pages_log, shard_config.urls_file))
+    write_log(pages, config.pages_log)
+    write_json(pages, config.urls_file, config.sorted_urls_file)
+
+    fingerprints = dict()   # insertion ordered union
+    for shard_config in [config] + shard_configs:
+        if os.path.exists(shard_config.fingerprints_file):
+            with open(shard_config.fingerprints_file, 'rb') as file:
+                fingerprints.update(dict.fromkeys(array("Q", file.read())))
+    with open(config.fingerprints_file, 'wb') as file:
+        file.write(array("Q", fingerprints).tobytes())
+
+    token_index = TokenIndex(config.token_index_dir, config.index_budget)
+    for shard_config in shard_configs:
+        token_index.absorb(TokenIndex(shard_config.token_index_dir))
+        shutil.rmtree(shard_config.token_index_dir, ignore_errors=True)
+    token_index.close()
+    token_index.merge()
+
+
+class ShardedCrawler(object):
+    ''' Runs the crawl in `processes` processes, each owning the hosts that
+    shard_of maps to it, and merges their results when all are done. '''
+
+    def __init__(self, config, restart, processes, worker_factory=Worker):
+        self.config = config
+        self.restart = restart
+        self.processes = processes
+        self.worker_factory = worker_factory
+        self.logger = get_logger("CRAWLER")
+
+    def start(self):
+        leftover = shards_on_disk(self.config)
+        if leftover:
+            # an interrupted crawl did not merge its data, its shards' saves already count those pages
+            self.logger.info(f"Merging the data of {leftover} processes of an earlier crawl.")
+            merge_shards(self.config, leftover)
+        for shard in range(self.processes):
+            prepare_shard_data(self.config, self.config.for_shard(shard), shard, self.processes)
+        inboxes = [multiprocessing.Queue() for _ in range(self.processes)]
+        outstanding = multiprocessing.Value("q", self.processes)
+        workers = [
+            multiprocessing.Process(
+                target=run_shard,
+                args=(shard, self.processes, self.config, self.restart, inboxes, outstanding,
+                      self.worker_factory))
+            for shard in range(self.processes)]
+        for worker in workers:
+            worker.start()
+        self._join(workers)
+        self.logger.info(f"All {self.processes} processes finished, merging their data.")
+        merge_shards(self.config, self.processes)
+
+    def _join(self, workers):
+        ''' Waits for the processes to finish. If one fails, the others would
+        wait for its urls forever: they are stopped, and their data is merged
+        on the next start. '''
+        running = {worker.sentinel: worker for worker in workers}
+        while running:
+            for sentinel in multiprocessing.connection.wait(list(running)):
+                worker = running.pop(sentinel)
+                worker.join()
+                if worker.exitcode != 0:
+                    self.logger.error(
+                        f"Process {worker.name} exited with code {worker.exitcode}, stopping the others.")
+                    for other in running.values():
+                        other.terminate()
+                    for other in running.values():
+                        other.join()
+                    raise RuntimeError(f"Crawler process {worker.name} failed.")
@@ -1,10 +1,17 @@
-from threading import Thread
+import time
+import multiprocessing
+import lxml.etree
+
+from functools import partial
+from urllib.parse import urlparse
+from threading import Thread, Lock, BoundedSemaphore
+from concurrent.futures import ProcessPoolExecutor
 
 from inspect import getsource
 from utils.download import download
 from utils import get_logger
+from utils.metrics import metrics
 import scraper
-import time
 
 
 class Worker(Thread):
@@ -23,12 +30,203 @@ class Worker(Thread):
             if not tbd_url:
                 self.logger.info("Frontier is empty. Stopping Crawler.")
                 break
+            deferred = False
+            try:
+                deferred = self.read_robots(tbd_url)
+                if not deferred:
+                    self.crawl(tbd_url)
+            except Exception:
+                # keep the worker alive, other workers wait for the url to be marked complete
+                self.logger.exception(f"Crawling {tbd_url} failed.")
+            finally:
+                # the frontier waits out the politeness delay of this url's host
+                with metrics.time("frontier_complete"):
+                    if deferred:
+                        self.frontier.defer_url(tbd_url)
+                    else:
+                        self.frontier.mark_url_complete(tbd_url)
+
+    def download(self, tbd_url):
+        with metrics.time("download"):
             resp = download(tbd_url, self.config, self.logger)
-            self.logger.info(
-                f"Downloaded {tbd_url}, status <{resp.status}>, "
-                f"using cache {self.config.cache_server}.")
+        metrics.count("pages")
+        metrics.count(f"status {resp.status}")
+        self.logger.info(
+            f"Downloaded {tbd_url}, status <{resp.status}>, "
+            f"using cache {self.config.cache_server}.")
+        return resp
+
+    def observe(self, tbd_url, resp, page=True):
+        ''' Tells the frontier how the download of tbd_url went, which adapts
+        its host's delay. Called once the scraper has decided on the page, so
+        a page it rejected unread (e.g. a trap) is not unpickled just to see
+        whether it was empty. robots.txt and sitemaps (page=False) are not
+        pages, an empty one does not slow the host down. '''
+        if page and (resp.status != 200 or resp.loaded):
+            # resp.body unpickles the page, so outside the frontier's lock
+            productive = resp.status == 200 and bool(resp.body)
+        else:
+            productive = None
+        self.frontier.observe(tbd_url, resp.status, productive, resp.latency)
+
+    def read_robots(self, tbd_url):
+        ''' Downloads the robots.txt of tbd_url's host in tbd_url's place, in
+        the host's turn, if its rules are not cached, and queues the sitemaps
+        it lists. Returns whether it did, or whether the robots.txt could not
+        be downloaded lately: tbd_url then goes back to the frontier (see
+        Frontier.defer_url) and is checked against the rules in a later turn. '''
+        if scraper.robots.unreachable_for(tbd_url):
+            return True
+        if not scraper.robots.needs_rules(tbd_url):
+            return False
+        resp = self.download(scraper.robots.robots_url(tbd_url))
+        self.observe(tbd_url, resp, page=False)
+        sitemaps = scraper.filter_sitemaps(scraper.robots.load(tbd_url, resp))
+        self.frontier.add_urls(sitemaps, depth=0)   # fetched early, like seeds
+        return True
+
+    def fetch(self, tbd_url):
+        ''' Downloads tbd_url, unless robots.txt rules read since it was
+        queued disallow it. Returns the Response of a page to scrape, which
+        the caller observes once it is scraped, or None (also for a sitemap,
+        its urls are queued here). '''
+        if not scraper.robots.allowed(urlparse(tbd_url)):
+            return None
+        resp = self.download(tbd_url)
+        if scraper.robots.is_sitemap(tbd_url):
+            self.observe(tbd_url, resp, page=False)
+            self.read_sitemap(tbd_url, resp)
+            return None
+        return resp
+
+    def read_sitemap(self, tbd_url, resp, batch_size=1000):
+        ''' Adds the urls worth crawling of the sitemap in resp (at depth 1,
+        like links on a host's home page) in batches of batch_size, one
+        frontier lock per batch, and the sitemaps it indexes. '''
+        content = resp.body if resp.status == 200 else None
+        if not content:
+            return
+        urls, sitemaps, added = list(), list(), 0
+        with metrics.time("sitemaps"):
+            for kind, url in scraper.robots.read_sitemap(tbd_url, content):
+                if kind == "sitemap":
+                    sitemaps.append(url)
+                    continue
+                urls.append(url)
+                if len(urls) >= batch_size:
+                    added += self.frontier.add_urls(scraper.filter_urls(urls), depth=1)
+                    urls = list()
+            added += self.frontier.add_urls(scraper.filter_urls(urls), depth=1)
+            added += self.frontier.add_urls(scraper.filter_sitemaps(sitemaps), depth=0)
+        self.logger.info(f"Added {added} urls from sitemap {tbd_url}.")
+
+    def crawl(self, tbd_url):
+        resp = self.fetch(tbd_url)
+        if resp is None:
+            return
+        try:
             scraped_urls = scraper.scraper(tbd_url, resp)
+        finally:
+            self.observe(tbd_url, resp)
+        with metrics.time("frontier_add"):
             for scraped_url in scraped_urls:
-                self.frontier.add_url(scraped_url)
-            self.frontier.mark_url_complete(tbd_url)
-            time.sleep(self.config.time_delay)
+                self.frontier.add_url(scraped_url, tbd_url)
+
+
+class ParsePool(object):
+    ''' Process pool that runs scraper.parse_page_content for the PoolWorkers.
+
+    At most `max_pending` pages are submitted and not yet applied, a worker
+    submitting one more blocks until a page is done, so a busy pool holds
+    back the downloads instead of filling memory with pages. '''
+
+    def __init__(self, config):
+        # spawn: forking a process full of threads could copy a held lock
+        self.executor = ProcessPoolExecutor(
+            config.parse_processes, mp_context=multiprocessing.get_context("spawn"),
+            initializer=scraper.configure, initargs=(config,))
+        self.slots = BoundedSemaphore(config.parse_queue)
+
+    def submit(self, page, callback):
+        ''' Parses page in the pool and calls callback(future) in this process. '''
+        self.slots.acquire()
+        future = self.executor.submit(scraper.parse_page_content, *page)
+        future.add_done_callback(self._release)
+        future.add_done_callback(callback)
+
+    def _release(self, future):
+        self.slots.release()
+
+    def shutdown(self):
+        self.executor.shutdown()
+
+
+parse_pool = None
+parse_pool_lock = Lock()
+
+
+def get_parse_pool(config):
+    global parse_pool
+    with parse_pool_lock:
+        if parse_pool is None:
+            parse_pool = ParsePool(config)
+        return parse_pool
+
+
+def shutdown_parse_pool():
+    global parse_pool
+    with parse_pool_lock:
+        if parse_pool is not None:
+            parse_pool.shutdown()
+            parse_pool = None
+
+
+class PoolWorker(Worker):
+    ''' Worker that only downloads: pages are parsed and tokenized in the
+    shared ParsePool, and the links and tokens it returns are stored and
+    added to the frontier in this process once the page is done. '''
+
+    def run(self):
+        pool = get_parse_pool(self.config)
+        while True:
+            tbd_url = self.frontier.get_tbd_url()
+            if not tbd_url:
+                self.logger.info("Frontier is empty. Stopping Crawler.")
+                break
+            submitted = deferred = False
+            try:
+                deferred = self.read_robots(tbd_url)
+                resp = None if deferred else self.fetch(tbd_url)
+                page = None
+                if resp is not None:
+                    page = scraper.page_to_parse(tbd_url, resp)
+                    self.observe(tbd_url, resp)
+                if page is not None:
+                    pool.submit(page, partial(self._parsed, tbd_url, resp.url, time.perf_counter()))
+                    submitted = True    # _parsed marks it complete
+            except Exception:
+                # keep the worker alive, other workers wait for the url to be marked complete
+                self.logger.exception(f"Crawling {tbd_url} failed.")
+            finally:
+                if deferred:
+                    self.frontier.defer_url(tbd_url)
+                elif not submitted:
+                    self.frontier.mark_url_complete(tbd_url)
+
+    def _parsed(self, url, resp_url, submitted, future):
+        # parse/tokenize timings stay in the pool's processes, this is the wait for them
+        metrics.observe("parse_pool", time.perf_counter() - submitted)
+        scraped_urls = []
+        try:
+            scraped_urls = scraper.store_page_content(resp_url, *future.result())
+        except lxml.etree.ParserError:  # empty HTML document
+            pass
+        except Exception:
+            self.logger.exception(f"Scraper failed on {url}.")
+        try:
+            with metrics.time("frontier_add"):
+                for scraped_url in scraped_urls:
+                    self.frontier.add_url(scraped_url, url)
+        finally:
+            with metrics.time("frontier_complete"):
+                self.frontier.mark_url_complete(url)
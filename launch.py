@@ -4,14 +4,24 @@ from argparse import ArgumentParser
 from utils.server_registration import get_cache_server
 from utils.config import Config
 from crawler import Crawler
+from crawler.worker import Worker, PoolWorker
+from crawler.shards import ShardedCrawler, shard_save_files
 
 
-def main(config_file, restart):
+def main(config_file, restart, processes=1):
     cparser = ConfigParser()
     cparser.read(config_file)
     config = Config(cparser)
-    config.cache_server = get_cache_server(config, restart)
-    crawler = Crawler(config, restart)
+    # a sharded crawl saves its progress in one file per process
+    save_files = shard_save_files(config, processes) if processes > 1 else [config.save_file]
+    config.cache_server = get_cache_server(config, restart, save_files)
+    # threads only download when pages are parsed in a process pool
+    worker_factory = PoolWorker if config.parse_processes > 0 else Worker
+    if processes > 1:
+        # one process per shard of the hosts, THREADCOUNT workers each
+        crawler = ShardedCrawler(config, restart, processes, worker_factory)
+    else:
+        crawler = Crawler(config, restart, worker_factory=worker_factory)
     crawler.start()
 
 
@@ -19,6 +29,7 @@ if __name__ == "__main__":
     parser = ArgumentParser()
     parser.add_argument("--restart", action="store_true", default=False)
     parser.add_argument("--config_file", type=str, default="config.ini")
+    parser.add_argument("--processes", type=int, default=1)
     args = parser.parse_args()
 
-    main(args.config_file, args.restart)
+    main(args.config_file, args.restart, args.processes)
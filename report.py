@@ -0,0 +1,87 @@
+import os
+import json
+import heapq
+import itertools
+from configparser import ConfigParser
+from argparse import ArgumentParser
+from urllib.parse import urlparse
+
+import scraper
+from utils.config import Config
+from utils.page_store import read_pages
+
+
+class CrawlReport(object):
+    ''' Crawl analytics, computed in one pass over the stored pages.
+
+    The counters are saved to config.report_file, so the next run only reads
+    the pages stored after the ones already counted. The top words are taken
+    from a single streaming pass over the token index with a heap. '''
+
+    def __init__(self, state=None):
+        state = state or dict()
+        self.pages_read = state.get("pages_read", 0)            # stored pages counted so far
+        self.longest_page = state.get("longest_page", [None, 0])  # [url, word count]
+        self.subdomains = state.get("subdomains", dict())       # ics.uci.edu subdomain -> pages
+        self.top_words = state.get("top_words", list())         # [[word, count]], most common first
+
+    def add_page(self, url, word_count):
+        self.pages_read += 1
+        if word_count > self.longest_page[1]:
+            self.longest_page = [url, word_count]
+        hostname = urlparse(url).hostname or ""
+        if hostname.endswith(".ics.uci.edu"):
+            self.subdomains[hostname] = self.subdomains.get(hostname, 0) + 1
+
+    def update_pages(self, pages):
+        ''' Counts the pages stored since the last update (pages keeps crawl order). '''
+        for url, word_count in itertools.islice(pages.items(), self.pages_read, None):
+            self.add_page(url, word_count)
+
+    def update_words(self, token_index, k=50):
+        commons = ((word, frq) for word, frq in token_index.totals() if word not in scraper.STOPWORDS)
+        self.top_words = [[word, frq] for word, frq in heapq.nlargest(k, commons, key=lambda x: x[1])]
+
+    def state(self):
+        return {
+            "pages_read": self.pages_read,
+            "longest_page": self.longest_page,
+            "subdomains": self.subdomains,
+            "top_words": self.top_words}
+
+    def __str__(self):
+        lines = [f"Unique pages: {self.pages_read}",
+                 f"Longest page: {self.longest_page[0]} ({self.longest_page[1]} words)",
+                 "50 most common words:"]
+        lines += [f"    {word}, {frq}" for word, frq in self.top_words]
+        lines.append(f"Subdomains of ics.uci.edu: {len(self.subdomains)}")
+        lines += [f"    {hostname}, {count}" for hostname, count in sorted(self.subdomains.items())]
+        return "\n".join(lines)
+
+
+def main(config_file, full):
+    cparser = ConfigParser()
+    cparser.read(config_file)
+    config = Config(cparser)
+    scraper.configure(config)
+
+    state = None
+    if not full and os.path.exists(config.report_file):
+        with open(config.report_file, 'r') as file:
+            state = json.load(file)
+    report = CrawlReport(state)
+    report.update_pages(read_pages(config.pages_log, config.urls_file))
+    report.update_words(scraper.token_index)
+
+    with open(config.report_file, 'w') as file:
+        json.dump(report.state(), file, indent=4)
+    print(report)
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser()
+    parser.add_argument("--full", action="store_true", default=False)
+    parser.add_argument("--config_file", type=str, default="config.ini")
+    args = parser.parse_args()
+
+    main(args.config_file, args.full)
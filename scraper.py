@@ -1,34 +1,81 @@
 import re
-from urllib.parse import urlparse
-from bs4 import BeautifulSoup as bs
+from urllib.parse import urlparse, urljoin
 import lxml.html
 import lxml.etree
-from collections import defaultdict
-import json
-from difflib import SequenceMatcher 
-import bisect
+from collections import Counter
+import heapq
+from utils.page_store import PageStore
+from utils.url_traps import UrlTrapDetector
+from utils.token_index import TokenIndex
+from utils.url_filter import UrlFilter
+from utils.robots import RobotsCache
+from utils.simhash import SimHashIndex, simhash
+from utils.metrics import metrics
 
 # import nltk
 # nltk.download('stopwords')
 # from nltk.corpus import stopwords
 
+# {url : word count} of every stored page, appended to data/pages.log,
+# data/urls.json and data/urlsSorted.json are rewritten from it periodically
+page_store = PageStore('data/pages.log', 'data/urls.json', 'data/urlsSorted.json')
+# the stored urls sorted in memory, for checking similarity between nearby links
+sorted_urls = page_store.sorted_urls
+# stored urls counted per path/query template, for catching traps like calendars
+url_traps = UrlTrapDetector(load_urls=page_store.urls)
+# "template" uses url_traps, "sequence" the SequenceMatcher check on sorted neighbours
+similarity_mode = "template"
+# robots.txt rules per host, downloaded by the workers once configure() enables it
+robots = RobotsCache()
+# scheme/host/extension and robots.txt checks, then is_link_similar, built once for every url checked
+url_filter = UrlFilter(lambda url: is_link_similar(url), robots=robots)
+# only the scheme/host/extension checks, for parse_page_content (no stored urls needed)
+page_filter = UrlFilter(lambda url: False)
+# inverted index of token -> [(url id, count)], replaces data/tokenFrequency.json
+token_index = TokenIndex('data/tokenIndex')
+# SimHash fingerprints of stored pages, pages within distance bits of one are not stored again
+page_fingerprints = SimHashIndex('data/fingerprints.bin')
+duplicate_distance = 3      # -1 turns the check off
+duplicate_links = True      # whether links found on duplicate pages are still crawled
+
+
+'''
+Applies the crawler settings from config.ini to the scraper.
+    Params:
+        config (Config): crawler config
+'''
+def configure(config) -> None:
+    global similarity_mode, duplicate_distance, duplicate_links
+    similarity_mode = config.similarity_mode
+    page_store.log_file = config.pages_log
+    page_store.urls_file = config.urls_file
+    page_store.sorted_urls_file = config.sorted_urls_file
+    page_store.snapshot_interval = config.pages_snapshot
+    token_index.directory = config.token_index_dir
+    url_filter.domains = frozenset(config.domains)
+    page_filter.domains = url_filter.domains
+    url_traps.threshold = config.trap_threshold
+    token_index.memory_budget = config.index_budget
+    duplicate_distance = config.duplicate_distance
+    duplicate_links = config.duplicate_links
+    page_fingerprints.filename = config.fingerprints_file
+    page_fingerprints.distance = max(duplicate_distance, 0)
+    robots.enabled = config.robots
+    robots.user_agent = config.user_agent
+    robots.ttl = config.robots_ttl
+    robots.sitemap_urls = config.sitemap_urls
+
 
 # Takes a URL and a response object and returns a list of filtered links from the response object.
 def scraper(url, resp, save_to_disk=False, save_to_folder='scraped_pages'):
     filtered_links = []
     try:
         if (is_valid(resp.url)):    # only proceed if the given link is valid, mainly to see if url is similar to processed urls
-
-            links = extract_next_links(url, resp)   # links found from resp.url
-            if links is None:   # no urls on webpage
+            if resp.status != 200:  # if status != 200 OK, ignore
                 return []
-            filtered_links = [link for link in links if is_valid(link)]                 # only if links are valid
 
-            document = lxml.html.document_fromstring(resp.raw_response.content)         # html document
-            if len(document.text_content()) < 50000:                                    # avg word size 4.7 chars * 10,000 words, rounded up
-                tokens, wordCount = tokenize(document.text_content())                   # list of tokens, # of tokens
-                store_link(resp.url, wordCount)                                         # store {link : word count} into data/urls.json
-                store_word_to_url_frequency(resp.url, tokens)                           # store {tokens : [url, # of times token seen]} into data/tokensFrequency.json
+            links, tokens, wordCount = parse_page_content(url, resp.url, resp.raw_response.content)
+            filtered_links = store_page_content(resp.url, links, tokens, wordCount)
 
     except AttributeError:          # None-type url
         return filtered_links
@@ -38,6 +85,85 @@ def scraper(url, resp, save_to_disk=False, save_to_folder='scraped_pages'):
     return filtered_links
 
 
+'''
+Returns the page content to hand to parse_page_content, or None if the page should not be scraped.
+    Params:
+        url (str): the URL that was used to get the page
+        resp (Response): response from the cache server
+    Returns:
+        (url: str, resp.url: str, content: bytes) or None
+'''
+def page_to_parse(url, resp):
+    try:
+        if not is_valid(resp.url) or resp.status != 200:
+            return None
+        return (url, resp.url, resp.raw_response.content)
+    except AttributeError:      # None-type url or no raw response
+        return None
+
+
+'''
+The CPU heavy part of scraper: parses the page once, extracts its links and tokenizes its text (however long).
+Only uses the page itself, so it can run in another process (see crawler.worker.PoolWorker).
+    Params:
+        url (str): the URL that was used to get the page
+        resp_url (str): the actual url of the page
+        content (bytes): page content
+    Returns:
+        (links: list[str], tokens: dict[str]->int, wordCount: int): links passing the scheme/host/extension
+        checks, and the page's tokens
+'''
+def parse_page_content(url, resp_url, content):
+    with metrics.time("parse"):
+        document = lxml.html.document_fromstring(content, base_url=resp_url)
+    with metrics.time("extract_links"):
+        links = page_filter.filter_urls(page_links(url, resp_url, document))   # cheap checks, similarity is left to the caller
+
+    with metrics.time("tokenize"):
+        tokens, wordCount = tokenize(document.text_content())   # token counts, # of tokens
+    return (links, tokens, wordCount)
+
+
+'''
+Stores a page parsed by parse_page_content and returns its links worth crawling.
+    Params:
+        resp_url (str): the actual url of the page
+        links (list[str]): links found on the page
+        tokens (dict[str]->int): tokens of the page
+        wordCount (int): number of tokens
+    Returns:
+        filtered_links (list[str]): links that pass filter_urls
+'''
+def store_page_content(resp_url, links, tokens, wordCount):
+    with metrics.time("duplicate_check"):
+        duplicate = is_duplicate_page(tokens)
+    if duplicate:                                       # mirror, printer-friendly version, same listing...
+        metrics.count("duplicate_pages")
+        url_traps.add(resp_url)     # not stored, but counted, or a trap of near-identical pages never ends
+        if not duplicate_links:
+            return []
+
+    with metrics.time("link_filter"):
+        filtered_links = filter_urls(links)             # only if links are valid
+    if duplicate:
+        return filtered_links
+    with metrics.time("store"):
+        store_link(resp_url, wordCount)                 # store {link : word count} into the page store
+        store_word_to_url_frequency(resp_url, tokens)   # store {tokens : [url, # of times token seen]} into data/tokenIndex
+    return filtered_links
+
+
+'''
+Parses the page content into an lxml html document.
+    Params:
+        resp (Response): response with the page content
+    Returns:
+        document (lxml.html.HtmlElement): html document, with resp.url as its base url
+'''
+def parse_page(resp):
+    return lxml.html.document_fromstring(resp.raw_response.content, base_url=resp.url)
+
+
 # Implementation required.
 # url: the URL that was used to get the page
 # resp.url: the actual url of the page
@@ -47,116 +173,145 @@ def scraper(url, resp, save_to_disk=False, save_to_folder='scraped_pages'):
 #         resp.raw_response.url: the url, again
 #         resp.raw_response.content: the content of the page!
 # Return a list with the hyperlinks (as strings) scrapped from resp.raw_response.content
-def extract_next_links(url, resp):
+# document: the already parsed page, if the caller has one (see parse_page)
+def extract_next_links(url, resp, document=None):
     if (resp.status != 200): # if status != 200 OK, ignore
         return None
 
-    soupified = bs(resp.raw_response.content, features='lxml')   # BeautifulSoup object
-    aTags = soupified.select('a')                                # list of all <a> tags
+    if document is None:
+        document = parse_page(resp)
+    return page_links(url, resp.url, document)
+
+
+'''
+Returns the hyperlinks of a parsed page, resolved and without fragments.
+    Params:
+        url (str): the URL that was used to get the page
+        resp_url (str): the actual url of the page
+        document (lxml.html.HtmlElement): the parsed page
+    Returns:
+        hyperlinks (list[str]): links found on the page, except links to itself
+'''
+def page_links(url, resp_url, document):
+    base = resp_url
+    for href in document.xpath('//base/@href')[:1]:     # page may set its own base for relative links
+        base = urljoin(resp_url, href.strip())
 
     # get all hyperlinks from webpage
     hyperlinks = set()
-    for link in aTags:
+    for link in document.iter('a'):
+        href = link.get('href')
+        if href is None:    # no link given with 'href' tag
+            continue
         try:
-            if link['href'] != url and link['href'] != resp.url:    # ignore self-referential link
-                hyperlinks.add(link['href'].partition("#")[0])      # ignore fragment
-
-        except KeyError:    # no link given with 'href' tag
-            pass
+            href = urljoin(base, href.strip()).partition("#")[0]   # resolve relative link, ignore fragment
+        except ValueError:  # malformed link, e.g. bad IPv6 host
+            continue
+        if href != url and href != resp_url:    # ignore self-referential link
+            hyperlinks.add(href)
 
     return list(hyperlinks)
 
 
+'''
+Checks the page's SimHash against the pages stored so far, and remembers it if it is new.
+    Params:
+        tokens (dict[str]->int): tokens of the page
+    Returns:
+        duplicate (bool): True if a stored page is at most duplicate_distance bits away
+'''
+def is_duplicate_page(tokens) -> bool:
+    if duplicate_distance < 0:
+        return False
+    fingerprint = simhash(tokens)
+    if fingerprint is None:     # no text to compare
+        return False
+    return not page_fingerprints.add(fingerprint)
+
+
 # Decide whether to crawl this url or not. 
 # If you decide to crawl it, return True; otherwise return False.
-# There are already some conditions that return False.
+# Scheme, host and file extension are checked first, the similarity check
+# (ignore trap-like links, see similarity_mode) only runs on urls that pass them.
 def is_valid(url):
-    try:
-        if is_link_similar(url):    # ignore links with high similarity >95%
-            return False
-
-        parsed = urlparse(url)
-
-        #invalid scheme
-        if parsed.scheme not in set(["http", "https"]):
-            return False
-
-        #invalid hostname
-        accepted_hostnames = {"ics.uci.edu", "cs.uci.edu", "informatics.uci.edu", "stat.uci.edu"}   
-        if not any([parsed.hostname.endswith(hostname) for hostname in accepted_hostnames]):
-            return False
-
-        # invalid file extension
-        return not re.match(
-            r".*\.(css|js|bmp|gif|jpe?g|ico"
-            + r"|png|tiff?|mid|mp2|mp3|mp4"
-            + r"|wav|avi|mov|mpeg|ram|m4v|mkv|ogg|ogv|pdf"
-            + r"|ps|eps|tex|ppt|pptx|doc|docx|xls|xlsx|names"
-            + r"|data|dat|exe|bz2|tar|msi|bin|7z|psd|dmg|iso"
-            + r"|epub|dll|cnf|tgz|sha1"
-            + r"|thmx|mso|arff|rtf|jar|csv"
-            + r"|rm|smil|wmv|swf|wma|zip|rar|gz"
-            + r"|odc|ppsx|git|ps|bib"                             # extensions added by us
-            + r")$", parsed.path.lower())
-
-    except TypeError:
-        print ("TypeError for ", parsed)
-        raise
-    except AttributeError:  # url parsed incorrectly or is NoneType, does not have scheme attribute
-        return False
+    return url_filter.is_valid(url)
+
+
+# Returns the urls worth crawling out of urls, in the same order.
+def filter_urls(urls):
+    return url_filter.filter_urls(urls)
+
+
+# Returns the sitemaps worth downloading out of urls: only the scheme and host are
+# checked, sitemaps are not pages (and are often .xml.gz).
+def filter_sitemaps(urls):
+    return [url for url in urls if url_filter.in_scope(url)]
+
+
+# bytes translation table for tokenize: ascii letters and digits are kept (lowercased), every other byte becomes a space
+TOKEN_BYTES = bytes(byte if chr(byte).isascii() and chr(byte).isalnum() else ord(' ') for byte in range(256)).lower()
+# text is tokenized in chunks of about this many characters, so big pages never need one huge token list
+TOKENIZE_CHUNK = 1 << 20
+SEPARATOR = re.compile(r'[^a-zA-Z0-9]')
 
 
 '''
-Returns the tokens found in a piece of text.
+Splits text into chunks of about size characters, cutting only between tokens.
     Params:
-        text: A piece of text to go through
+        text (str): text to split
+        size (int): chunk size
     Returns:
-        (tokens: list[str], tokenCount: int): List of tokens and size of list
+        chunks (iterator of str)
 '''
-def tokenize(text) -> tuple(list[str], int):
-    tokens = defaultdict(int)
+def text_chunks(text, size=TOKENIZE_CHUNK):
+    start = 0
+    while start < len(text):
+        separator = SEPARATOR.search(text, start + size)    # first non-token character after the cut
+        end = separator.start() + 1 if separator else len(text)
+        yield text[start:end]
+        start = end
 
-    try:
-        newtokens = re.findall(r'[a-zA-Z0-9]+', text)   # get all tokens
-        for newtoken in newtokens:
-            tokens[newtoken.lower()] += 1               # treat token as lowercase, increment its count
-    except:
-        return (tokens, len(tokens))
 
+'''
+Returns the tokens found in a piece of text: runs of ascii letters and digits, lowercased.
+    Params:
+        text: A piece of text to go through
+        stopwords (frozenset[str]): tokens to leave out, e.g. STOPWORDS, or None to keep all tokens
+    Returns:
+        (tokens: dict[str]->int, tokenCount: int): count of each token and number of distinct tokens
+'''
+def tokenize(text, stopwords=None) -> tuple[dict[str, int], int]:
+    counts = Counter()
+    for chunk in text_chunks(text):
+        # non-ascii characters are separators, same as for the [a-zA-Z0-9]+ regex
+        counts.update(chunk.encode('utf-8', 'replace').translate(TOKEN_BYTES).split())   # counted in C, one call per chunk
+
+    tokens = dict()
+    for token, count in counts.items():
+        token = token.decode('ascii')
+        if stopwords is None or token not in stopwords:
+            tokens[token] = count
     return (tokens, len(tokens))
 
 
 '''
-Stores the url and associated word count into data/urls.json, alphabetical order version into data/urlsSorted.json
+Stores the url and associated word count into the page store (data/pages.log), which also adds it to sorted_urls.
+data/urls.json and the alphabetical order version data/urlsSorted.json are rewritten from it in the background.
     Params:
         url (str): url to store
         wordCount (int): number of tokens or words in url
 '''
 def store_link(url : str, wordCount : int) -> None:
-    # add url to urls mapped to total word count
-    with open('data/urls.json', 'r') as file:
-        data = json.load(file)
-    with open('data/urls.json', 'w') as file:
-        data[url] = wordCount
-        json.dump(data, file, indent=4)     # pretty dumb (indentation)
-
-    # add url into sorted list, for checking similarity between nearby links
-    with open('data/urlsSorted.json', 'r') as file:
-        data = json.load(file)
-        loc = bisect.bisect(data["urls"], url)      # location for url to be added, O(log(N))
-        data["urls"].insert(loc, url)               # add url at loc
-    with open('data/urlsSorted.json', 'w') as file:
-        json.dump(data, file, indent=4)     # pretty dumb (indentation)
+    page_store.add(url, wordCount)      # same cost per page however many are stored
+    url_traps.add(url)
 
 '''
-Get all subdomains and their counts from data/urls.json.
+Get all subdomains and their counts from the stored urls.
     Returns:
         subdomain_counts (dict[str]->int): dictionary of subdomains and their counts
 '''
 def count_subdomains():
-    # load the URLs from the JSON file
-    with open("/Users/jerrychen/Desktop/UCI/Spring23/INF141/subdom/urlsSorted.json", 'r') as f:
-        urls = json.load(f)["urls"]
+    urls = sorted_urls.snapshot()   # stored urls, already in memory
 
     # count the occurrences of each subdomain
     subdomain_counts = {}
@@ -173,87 +328,47 @@ def count_subdomains():
 
 
 '''
-Get the number of unique urls from data/urls.json.
+Get the number of unique urls stored.
     Returns:
         count (int): number of urls
 '''
 def num_pages() -> int:
-    data = 0
-    with open("data/urls.json", "r") as file:
-        data = json.load(file)
-    return len(data)    # size of dictionary containing links
+    return len(page_store)
 
 
 '''
-Returns the tokens found in a piece of text.
+Checks whether a url is too similar to the urls stored so far.
     Params:
         s (str): url
     Returns:
         similar (bool): whether the url is too similar or not
 '''
 def is_link_similar(s : str) -> bool:
-    tr = False
-    with open('data/urlsSorted.json', 'r') as file:
-        data =  json.load(file)
-        idx = bisect.bisect(data["urls"], s)    # get supposed new index of url in sorted list
-        try:
-            if len(data["urls"]) >= 3:
-                # similarity ratios, scaled 0-1
-                diff0 = SequenceMatcher(None, s, data["urls"][idx - 2]).ratio()
-                diff1 = SequenceMatcher(None, s, data["urls"][idx - 1]).ratio()
-                diff2 = SequenceMatcher(None, s, data["urls"][idx]).ratio()
-                diff3 = SequenceMatcher(None, s, data["urls"][idx + 1]).ratio()
-                if diff0 >= 0.95 and diff1 >= 0.95:     # previous 2 are too similar
-                    tr = True
-                if diff2 >= 0.95 and diff3 >= 0.95:     # following 2 are too similar
-                    tr = True
-                if diff1 >= 0.95 and diff2 >= 0.95:     # surrounding 2 are too similar
-                    tr = True
-        except IndexError:      # indexOutOfBounds, ignore and move on to next
-            pass
-    return tr
+    with metrics.time("similarity"):
+        if similarity_mode == "sequence":
+            return sorted_urls.is_similar(s)
+        return url_traps.is_trap(s)
 
 
 '''
-Returns the tokens found in a piece of text.
+Stores the url and how often each token was seen on it into the token index (data/tokenIndex).
     Params:
         url (str): url
         tokens (dict[str]->count): 
 '''
 def store_word_to_url_frequency(url, tokens) -> None: 
-    with open('data/tokenFrequency.json', 'r') as file:
-        data = json.load(file)
-    with open('data/tokenFrequency.json', 'w') as file:
-        for word in tokens:
-            if word not in data:
-                data[word] = [[url, tokens[word]]]      # create the outer list if word has not been seen
-            else:
-                data[word].append([url, tokens[word]])  # else just append the current url and # of times the token was seen 
+    token_index.add(url, tokens)    # buffered in memory, spilled to sorted segment files
 
-        json.dump(data, file, indent=2)
 
+# stopwords is a frozenset because a set is more efficient to access elements in terms of time complexity, compared to a list
+# (built once at import, shared by top50commonwords and report.py)
+STOPWORDS = frozenset({"able","about","above","abroad","according","accordingly","across","actually","adj","after","afterwards","again","against","ago","ahead","ain't","all","allow","allows","almost","alone","along","alongside","already","also","although","always","am","amid","amidst","among","amongst","an","and","another","any","anybody","anyhow","anyone","anything","anyway","anyways","anywhere","apart","appear","appreciate","appropriate","are","aren't","around","as","a's","aside","ask","asking","associated","at","available","away","awfully","back","backward","backwards","be","became","because","become","becomes","becoming","been","before","beforehand","begin","behind","being","believe","below","beside","besides","best","better","between","beyond","both","brief","but","by","came","can","cannot","cant","can't","caption","cause","causes","certain","certainly","changes","clearly","c'mon","co","co.","com","come","comes","concerning","consequently","consider","considering","contain","containing","contains","corresponding","could","couldn't","course","c's","currently","dare","daren't","definitely","described","despite","did","didn't","different","directly","do","does","doesn't","doing","done","don't","down","downwards","during","each","edu","eg","eight","eighty","either","else","elsewhere","end","ending","enough","entirely","especially","et","etc","even","ever","evermore","every","everybody","everyone","everything","everywhere","ex","exactly","example","except","fairly","far","farther","few","fewer","fifth","first","five","followed","following","follows","for","forever","former","formerly","forth","forward","found","four","from","further","furthermore","get","gets","getting","given","gives","go","goes","going","gone","got","gotten","greetings","had","hadn't","half","happens","hardly","has","hasn't","have","haven't","having","he","he'd","he'll","hello","help","hence","her","here","hereafter","hereby","herein","here's","hereupon","hers","herself","he's","hi","him","himself","his","hither","hopefully","how","howbeit","however","hundred","i'd","ie","if","ignored","i'll","i'm","immediate","in","inasmuch","inc","inc.","indeed","indicate","indicated","indicates","inner","inside","insofar","instead","into","inward","is","isn't","it","it'd","it'll","its","it's","itself","i've","just","k","keep","keeps","kept","know","known","knows","last","lately","later","latter","latterly","least","less","lest","let","let's","like","liked","likely","likewise","little","look","looking","looks","low","lower","ltd","made","mainly","make","makes","many","may","maybe","mayn't","me","mean","meantime","meanwhile","merely","might","mightn't","mine","minus","miss","more","moreover","most","mostly","mr","mrs","much","must","mustn't","my","myself","name","namely","nd","near","nearly","necessary","need","needn't","needs","neither","never","neverf","neverless","nevertheless","new","next","nine","ninety","no","nobody","non","none","nonetheless","noone","no-one","nor","normally","not","nothing","notwithstanding","novel","now","nowhere","obviously","of","off","often","oh","ok","okay","old","on","once","one","ones","one's","only","onto","opposite","or","other","others","otherwise","ought","oughtn't","our","ours","ourselves","out","outside","over","overall","own","particular","particularly","past","per","perhaps","placed","please","plus","possible","presumably","probably","provided","provides","que","quite","qv","rather","rd","re","really","reasonably","recent","recently","regarding","regardless","regards","relatively","respectively","right","round","said","same","saw","say","saying","says","second","secondly","see","seeing","seem","seemed","seeming","seems","seen","self","selves","sensible","sent","serious","seriously","seven","several","shall","shan't","she","she'd","she'll","she's","should","shouldn't","since","six","so","some","somebody","someday","somehow","someone","something","sometime","sometimes","somewhat","somewhere","soon","sorry","specified","specify","specifying","still","sub","such","sup","sure","take","taken","taking","tell","tends","th","than","thank","thanks","thanx","that","that'll","thats","that's","that've","the","their","theirs","them","themselves","then","thence","there","thereafter","thereby","there'd","therefore","therein","there'll","there're","theres","there's","thereupon","there've","these","they","they'd","they'll","they're","they've","thing","things","think","third","thirty","this","thorough","thoroughly","those","though","three","through","throughout","thru","thus","till","to","together","too","took","toward","towards","tried","tries","truly","try","trying","t's","twice","two","un","under","underneath","undoing","unfortunately","unless","unlike","unlikely","until","unto","up","upon","upwards","us","use","used","useful","uses","using","usually","v","value","various","versus","very","via","viz","vs","want","wants","was","wasn't","way","we","we'd","welcome","well","we'll","went","were","we're","weren't","we've","what","whatever","what'll","what's","what've","when","whence","whenever","where","whereafter","whereas","whereby","wherein","where's","whereupon","wherever","whether","which","whichever","while","whilst","whither","who","who'd","whoever","whole","who'll","whom","whomever","who's","whose","why","will","willing","wish","with","within","without","wonder","won't","would","wouldn't","yes","yet","you","you'd","you'll","your","you're","yours","yourself","yourselves","you've","zero","a","how's","i","when's","why's","b","c","d","e","f","g","h","j","l","m","n","o","p","q","r","s","t","u","uucp","w","x","y","z","I","www","amount","bill","bottom","call","computer","con","couldnt","cry","de","describe","detail","due","eleven","empty","fifteen","fifty","fill","find","fire","forty","front","full","give","hasnt","herse","himse","interest","itse”","mill","move","myse”","part","put","show","side","sincere","sixty","system","ten","thick","thin","top","twelve","twenty","abst","accordance","act","added","adopted","affected","affecting","affects","ah","announce","anymore","apparently","approximately","aren","arent","arise","auth","beginning","beginnings","begins","biol","briefly","ca","date","ed","effect","et-al","ff","fix","gave","giving","heres","hes","hid","home","id","im","immediately","importance","important","index","information","invention","itd","keys","kg","km","largely","lets","line","'ll","means","mg","million","ml","mug","na","nay","necessarily","nos","noted","obtain","obtained","omitted","ord","owing","page","pages","poorly","possibly","potentially","pp","predominantly","present","previously","primarily","promptly","proud","quickly","ran","readily","ref","refs","related","research","resulted","resulting","results","run","sec","section","shed","shes","showed","shown","showns","shows","significant","significantly","similar","similarly","slightly","somethan","specifically","state","states","stop","strongly","substantially","successfully","sufficiently","suggest","thered","thereof","therere","thereto","theyd","theyre","thou","thoughh","thousand","throug","til","tip","ts","ups","usefully","usefulness","'ve","vol","vols","wed","whats","wheres","whim","whod","whos","widely","words","world","youd","youre"})
 
-def top50commonwords() -> list(): # returns list of top 50 common words ordered by frequency.
 
-    # stopwords is a set because a set is more efficient to access elements in terms of time complexity, compared to a list
-    stopwords = {"able","about","above","abroad","according","accordingly","across","actually","adj","after","afterwards","again","against","ago","ahead","ain't","all","allow","allows","almost","alone","along","alongside","already","also","although","always","am","amid","amidst","among","amongst","an","and","another","any","anybody","anyhow","anyone","anything","anyway","anyways","anywhere","apart","appear","appreciate","appropriate","are","aren't","around","as","a's","aside","ask","asking","associated","at","available","away","awfully","back","backward","backwards","be","became","because","become","becomes","becoming","been","before","beforehand","begin","behind","being","believe","below","beside","besides","best","better","between","beyond","both","brief","but","by","came","can","cannot","cant","can't","caption","cause","causes","certain","certainly","changes","clearly","c'mon","co","co.","com","come","comes","concerning","consequently","consider","considering","contain","containing","contains","corresponding","could","couldn't","course","c's","currently","dare","daren't","definitely","described","despite","did","didn't","different","directly","do","does","doesn't","doing","done","don't","down","downwards","during","each","edu","eg","eight","eighty","either","else","elsewhere","end","ending","enough","entirely","especially","et","etc","even","ever","evermore","every","everybody","everyone","everything","everywhere","ex","exactly","example","except","fairly","far","farther","few","fewer","fifth","first","five","followed","following","follows","for","forever","former","formerly","forth","forward","found","four","from","further","furthermore","get","gets","getting","given","gives","go","goes","going","gone","got","gotten","greetings","had","hadn't","half","happens","hardly","has","hasn't","have","haven't","having","he","he'd","he'll","hello","help","hence","her","here","hereafter","hereby","herein","here's","hereupon","hers","herself","he's","hi","him","himself","his","hither","hopefully","how","howbeit","however","hundred","i'd","ie","if","ignored","i'll","i'm","immediate","in","inasmuch","inc","inc.","indeed","indicate","indicated","indicates","inner","inside","insofar","instead","into","inward","is","isn't","it","it'd","it'll","its","it's","itself","i've","just","k","keep","keeps","kept","know","known","knows","last","lately","later","latter","latterly","least","less","lest","let","let's","like","liked","likely","likewise","little","look","looking","looks","low","lower","ltd","made","mainly","make","makes","many","may","maybe","mayn't","me","mean","meantime","meanwhile","merely","might","mightn't","mine","minus","miss","more","moreover","most","mostly","mr","mrs","much","must","mustn't","my","myself","name","namely","nd","near","nearly","necessary","need","needn't","needs","neither","never","neverf","neverless","nevertheless","new","next","nine","ninety","no","nobody","non","none","nonetheless","noone","no-one","nor","normally","not","nothing","notwithstanding","novel","now","nowhere","obviously","of","off","often","oh","ok","okay","old","on","once","one","ones","one's","only","onto","opposite","or","other","others","otherwise","ought","oughtn't","our","ours","ourselves","out","outside","over","overall","own","particular","particularly","past","per","perhaps","placed","please","plus","possible","presumably","probably","provided","provides","que","quite","qv","rather","rd","re","really","reasonably","recent","recently","regarding","regardless","regards","relatively","respectively","right","round","said","same","saw","say","saying","says","second","secondly","see","seeing","seem","seemed","seeming","seems","seen","self","selves","sensible","sent","serious","seriously","seven","several","shall","shan't","she","she'd","she'll","she's","should","shouldn't","since","six","so","some","somebody","someday","somehow","someone","something","sometime","sometimes","somewhat","somewhere","soon","sorry","specified","specify","specifying","still","sub","such","sup","sure","take","taken","taking","tell","tends","th","than","thank","thanks","thanx","that","that'll","thats","that's","that've","the","their","theirs","them","themselves","then","thence","there","thereafter","thereby","there'd","therefore","therein","there'll","there're","theres","there's","thereupon","there've","these","they","they'd","they'll","they're","they've","thing","things","think","third","thirty","this","thorough","thoroughly","those","though","three","through","throughout","thru","thus","till","to","together","too","took","toward","towards","tried","tries","truly","try","trying","t's","twice","two","un","under","underneath","undoing","unfortunately","unless","unlike","unlikely","until","unto","up","upon","upwards","us","use","used","useful","uses","using","usually","v","value","various","versus","very","via","viz","vs","want","wants","was","wasn't","way","we","we'd","welcome","well","we'll","went","were","we're","weren't","we've","what","whatever","what'll","what's","what've","when","whence","whenever","where","whereafter","whereas","whereby","wherein","where's","whereupon","wherever","whether","which","whichever","while","whilst","whither","who","who'd","whoever","whole","who'll","whom","whomever","who's","whose","why","will","willing","wish","with","within","without","wonder","won't","would","wouldn't","yes","yet","you","you'd","you'll","your","you're","yours","yourself","yourselves","you've","zero","a","how's","i","when's","why's","b","c","d","e","f","g","h","j","l","m","n","o","p","q","r","s","t","u","uucp","w","x","y","z","I","www","amount","bill","bottom","call","computer","con","couldnt","cry","de","describe","detail","due","eleven","empty","fifteen","fifty","fill","find","fire","forty","front","full","give","hasnt","herse","himse","interest","itse”","mill","move","myse”","part","put","show","side","sincere","sixty","system","ten","thick","thin","top","twelve","twenty","abst","accordance","act","added","adopted","affected","affecting","affects","ah","announce","anymore","apparently","approximately","aren","arent","arise","auth","beginning","beginnings","begins","biol","briefly","ca","date","ed","effect","et-al","ff","fix","gave","giving","heres","hes","hid","home","id","im","immediately","importance","important","index","information","invention","itd","keys","kg","km","largely","lets","line","'ll","means","mg","million","ml","mug","na","nay","necessarily","nos","noted","obtain","obtained","omitted","ord","owing","page","pages","poorly","possibly","potentially","pp","predominantly","present","previously","primarily","promptly","proud","quickly","ran","readily","ref","refs","related","research","resulted","resulting","results","run","sec","section","shed","shes","showed","shown","showns","shows","significant","significantly","similar","similarly","slightly","somethan","specifically","state","states","stop","strongly","substantially","successfully","sufficiently","suggest","thered","thereof","therere","thereto","theyd","theyre","thou","thoughh","thousand","throug","til","tip","ts","ups","usefully","usefulness","'ve","vol","vols","wed","whats","wheres","whim","whod","whos","widely","words","world","youd","youre"}
-
-    commons = {} # contains all words (ignoring stopwords) and its freq from tokenFrequency.json
-    top50 = [] # list of the top 50 common words by freq
-
-    with open('data/tokenFrequency.json', 'r') as file:
-        data = json.load(file)
-
-        for word in data:
-            if word not in stopwords:
-                frq = 0
-                for val in data[word]:
-                    frq += val[1]
-                commons[word] = frq
+def top50commonwords() -> list(): # returns list of top 50 common words ordered by frequency.
 
-    sorted_commons = dict(sorted(commons.items(), key = lambda x: x[1], reverse = True)) # sorting the dict by value in descending order
+    # all words (ignoring stopwords) and their total freq, streamed from the token index
+    commons = ((word, frq) for word, frq in token_index.totals() if word not in STOPWORDS)
+    top50 = heapq.nlargest(50, commons, key = lambda x: x[1]) # top 50 common words by freq, in descending order
 
-    for i in range(0, 50):
-        top50.append(list(sorted_commons)[i])
-    
-    return top50
\ No newline at end of file
+    return [word for word, frq in top50]
\ No newline at end of file
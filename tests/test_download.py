@@ -0,0 +1,40 @@
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+import requests
+
+from utils.download import Downloader
+
+
+def make_downloader():
+    config = SimpleNamespace(
+        cache_server=("127.0.0.1", 0), user_agent="test", max_in_flight=1,
+        timeout=1, retries=2, retry_backoff=0)
+    return Downloader(config)
+
+
+class DownloaderTest(unittest.TestCase):
+    def test_transient_errors_are_retried(self):
+        downloader = make_downloader()
+        error = requests.exceptions.ChunkedEncodingError("cut off")
+        with mock.patch.object(downloader.session, "get", side_effect=error) as get:
+            resp = downloader.download("https://www.ics.uci.edu")
+        self.assertEqual(get.call_count, 3)
+        self.assertIsNone(resp.status)
+        self.assertIn("3 attempts", resp.error)
+        self.assertLess(resp.latency, 1)    # the last attempt only, no backoff or queueing
+
+    def test_other_request_errors_fail_without_retrying(self):
+        for error in (requests.exceptions.TooManyRedirects(), requests.exceptions.InvalidURL(),
+                      requests.exceptions.ContentDecodingError()):
+            downloader = make_downloader()
+            with mock.patch.object(downloader.session, "get", side_effect=error) as get:
+                resp = downloader.download("https://www.ics.uci.edu")
+            self.assertEqual(get.call_count, 1)
+            self.assertIsNone(resp.status)
+            self.assertIn("1 attempts", resp.error)
+
+
+if __name__ == "__main__":
+    unittest.main()
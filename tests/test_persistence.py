@@ -0,0 +1,59 @@
+import os
+import sys
+import tempfile
+import textwrap
+import subprocess
+import unittest
+from types import SimpleNamespace
+
+from utils import get_urlhash
+from crawler.persistence import open_store
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def make_config(directory, persistence):
+    return SimpleNamespace(
+        save_file=os.path.join(directory, "frontier.save"), persistence=persistence,
+        commit_events=512, commit_ms=60000)
+
+
+def add_urls(directory, persistence, count, exit_code):
+    ''' Adds count urls in a new process that then exits through `exit_code`. '''
+    script = textwrap.dedent(f"""
+        import os, sys
+        from tests.test_persistence import make_config
+        from crawler.persistence import open_store
+        from utils import get_urlhash
+        store = open_store(make_config({directory!r}, {persistence!r}))
+        for i in range({count}):
+            url = f"https://www.ics.uci.edu/{{i}}"
+            store[get_urlhash(url)] = (url, False)
+        {exit_code}
+        """)
+    subprocess.run([sys.executable, "-c", script], cwd=ROOT, check=True)
+
+
+class CompactStoreTest(unittest.TestCase):
+    def test_uncommitted_urls_are_not_marked_seen(self):
+        with tempfile.TemporaryDirectory() as directory:
+            add_urls(directory, "compact", 10, "os._exit(0)")   # no commit at all
+            store = open_store(make_config(directory, "compact"))
+            self.assertEqual(len(store), 0)
+            self.assertNotIn(get_urlhash("https://www.ics.uci.edu/0"), store)
+            self.assertEqual(store.pending(), [])
+            store.close()
+
+    def test_buffered_urls_are_committed_at_exit(self):
+        for persistence in ("log", "compact"):
+            with tempfile.TemporaryDirectory() as directory:
+                add_urls(directory, persistence, 10, "sys.exit(0)")
+                store = open_store(make_config(directory, persistence))
+                self.assertEqual(len(store), 10)
+                self.assertIn(get_urlhash("https://www.ics.uci.edu/0"), store)
+                self.assertEqual(len(store.pending()), 10)
+                store.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,18 @@
+import unittest
+
+from crawler.rate_control import HostRateController
+
+
+class HostRateControllerTest(unittest.TestCase):
+    def test_downloads_that_are_not_pages_leave_the_delay_alone(self):
+        rate_control = HostRateController(0.5)
+        rate_control.observe("www.ics.uci.edu", 404, None, 0.1)     # e.g. a missing robots.txt
+        self.assertEqual(rate_control.delay("www.ics.uci.edu"), 0.5)
+        rate_control.observe("www.ics.uci.edu", 404, False, 0.1)
+        self.assertEqual(rate_control.delay("www.ics.uci.edu"), 1.0)
+        rate_control.observe("www.ics.uci.edu", 200, True, 0.1)
+        self.assertEqual(rate_control.delay("www.ics.uci.edu"), 0.5)
+
+
+if __name__ == "__main__":
+    unittest.main()
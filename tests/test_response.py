@@ -0,0 +1,53 @@
+import unittest
+
+import cbor
+
+from utils.response import loads_cbor_map
+
+
+def plain(values):
+    # byte strings come back as memoryviews of the payload
+    return {key: bytes(value) if isinstance(value, memoryview) else value for key, value in values.items()}
+
+
+SIMPLE = [
+    {},
+    {"url": "https://www.ics.uci.edu/", "status": 200, "response": b"\x80\x04pickled"},
+    {"text": "é ünïcode ✓", "empty": "", "bytes": b"", "long": "x" * 70000, "blob": bytes(range(256)) * 300},
+    {"small": 23, "byte": 24, "short": 300, "int": 70000, "long": 2 ** 40, "max": 2 ** 64 - 1},
+    {"negative": -1, "neg_byte": -25, "neg_short": -300, "neg_long": -2 ** 40, "min": -2 ** 64},
+    {"none": None, "true": True, "false": False, "error": None, 7: "int key"},
+]
+FALLBACK = [
+    {"url": "u", "status": 1.5},
+    {"url": "u", "list": [1, "two", b"three"]},
+    {"url": "u", "nested": {"a": {"b": None}}},
+]
+
+
+class LoadsCborMapTest(unittest.TestCase):
+    def test_same_as_cbor_loads(self):
+        for values in SIMPLE + FALLBACK:
+            with self.subTest(values=list(values)):
+                payload = cbor.dumps(values)
+                self.assertEqual(plain(loads_cbor_map(payload)), cbor.loads(payload))
+                self.assertEqual(plain(loads_cbor_map(payload)), values)
+
+    def test_byte_strings_are_views_of_the_payload(self):
+        payload = cbor.dumps({"response": b"pickled page"})
+        self.assertIsInstance(loads_cbor_map(payload)["response"], memoryview)
+
+    def test_truncated_payloads_raise_value_error(self):
+        for values in [SIMPLE[1]] + SIMPLE[3:] + FALLBACK:     # every cut of the short payloads
+            payload = cbor.dumps(values)
+            for end in range(len(payload)):
+                with self.subTest(values=list(values), end=end), self.assertRaises(ValueError):
+                    loads_cbor_map(payload[:end])
+
+    def test_trailing_bytes_raise_value_error(self):
+        with self.assertRaises(ValueError):
+            loads_cbor_map(cbor.dumps({"status": 200}) + b"\x00")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,61 @@
+import unittest
+from types import SimpleNamespace
+from urllib.parse import urlparse
+
+from utils.robots import RobotsCache, ROBOTS_ATTEMPTS, UNREACHABLE_TTL, parse_robots
+
+
+URL = "https://www.ics.uci.edu/private/page"
+
+
+def response(status, body=None):
+    return SimpleNamespace(status=status, body=memoryview(body) if body is not None else None)
+
+
+class RobotsCacheTest(unittest.TestCase):
+    def test_unknown_hosts_are_allowed_until_their_rules_are_read(self):
+        robots = RobotsCache(enabled=True)
+        self.assertTrue(robots.needs_rules(URL))
+        self.assertTrue(robots.allowed(urlparse(URL)))
+        robots.load(URL, response(200, b"User-agent: *\nDisallow: /private\nAllow: /private/page\nDisallow: /private/page2"))
+        self.assertFalse(robots.needs_rules(URL))
+        self.assertTrue(robots.allowed(urlparse(URL)))
+        self.assertFalse(robots.allowed(urlparse(URL + "2")))
+        self.assertFalse(robots.allowed(urlparse("https://www.ics.uci.edu/private/other")))
+
+    def test_unreachable_robots_txt_is_retried_before_its_urls_wait(self):
+        robots = RobotsCache(enabled=True)
+        for _ in range(ROBOTS_ATTEMPTS - 1):
+            robots.load(URL, response(None))
+            self.assertTrue(robots.needs_rules(URL))
+            self.assertEqual(robots.unreachable_for(URL), 0.0)
+        robots.load(URL, response(503))
+        self.assertFalse(robots.needs_rules(URL))
+        self.assertTrue(0 < robots.unreachable_for(URL) <= UNREACHABLE_TTL)
+        # links to the host are still queued, they wait instead of being dropped
+        self.assertTrue(robots.allowed(urlparse(URL)))
+
+    def test_listed_sitemaps_are_known(self):
+        robots = RobotsCache(enabled=True)
+        robots.load(URL, response(200, b"Sitemap: https://www.ics.uci.edu/sitemap.xml/\n"))
+        self.assertTrue(robots.is_sitemap("https://www.ics.uci.edu/sitemap.xml"))
+        self.assertFalse(robots.is_sitemap(URL))
+
+    def test_missing_robots_txt_allows_everything(self):
+        robots = RobotsCache(enabled=True)
+        robots.load(URL, response(None))
+        robots.load(URL, response(404))
+        self.assertFalse(robots.needs_rules(URL))
+        self.assertTrue(robots.allowed(urlparse(URL)))
+
+    def test_most_specific_user_agent_group(self):
+        rules = parse_robots(
+            b"User-agent: *\nDisallow: /\n\nUser-agent: IR UW24 crawler\nDisallow: /tmp\nCrawl-delay: 2\n",
+            "IR UW24 crawler 12345678")
+        self.assertTrue(rules.allowed("/page"))
+        self.assertFalse(rules.allowed("/tmp/x"))
+        self.assertEqual(rules.crawl_delay, 2.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,63 @@
+import random
+import unittest
+
+from crawler.scheduler import HostScheduler
+from crawler.priority import make_policy
+
+
+def drain(scheduler):
+    urls = list()
+    url, _ = scheduler.pop()
+    while url:
+        urls.append(url)
+        scheduler.release(url, 0)
+        url, _ = scheduler.pop()
+    return urls
+
+
+class HostSchedulerTest(unittest.TestCase):
+    def test_fifo_takes_turns_between_hosts(self):
+        scheduler = HostScheduler(0)
+        for page in range(2):
+            for host in "ab":
+                scheduler.push(f"http://{host}/{page}")
+        self.assertEqual(drain(scheduler), ["http://a/0", "http://b/0", "http://a/1", "http://b/1"])
+
+    def test_link_then_rescore_to_a_tie_with_the_replaced_entry(self):
+        # the linked url's new entry scores 1 better than its replaced one,
+        # fetching a url of its template makes it score 1 worse again
+        scheduler = HostScheduler(0, make_policy("depth,novelty,indegree"))
+        scheduler.push("http://p/1", 0)
+        scheduler.push("http://p/2", 1)
+        scheduler.link("http://p/2")
+        self.assertEqual(drain(scheduler), ["http://p/1", "http://p/2"])
+        self.assertEqual(len(scheduler), 0)
+
+    def test_random_operations_fetch_every_url_once(self):
+        for seed in range(300):
+            rand = random.Random(seed)
+            scheduler = HostScheduler(0, make_policy(rand.choice(
+                ["fifo", "depth,diversity,novelty,indegree", "novelty,indegree", "depth,indegree"])))
+            pushed, fetched = list(), list()
+            url = None
+            for _ in range(60):
+                action = rand.random()
+                if action < 0.4:
+                    pushed.append(f"http://{rand.choice('pq')}/{len(pushed)}")
+                    scheduler.push(pushed[-1], rand.randrange(3))
+                elif action < 0.6 and scheduler.entries:
+                    scheduler.link(rand.choice(list(scheduler.entries)))
+                else:
+                    if url:
+                        scheduler.release(url, 0)
+                    url, _ = scheduler.pop()
+                    if url:
+                        fetched.append(url)
+            if url:
+                scheduler.release(url, 0)
+            fetched += drain(scheduler)
+            self.assertEqual(sorted(fetched), sorted(pushed), seed)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,42 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+import scraper
+from utils.simhash import SimHashIndex
+from utils.url_traps import UrlTrapDetector
+
+
+class StorePageContentTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        patches = [
+            mock.patch.object(scraper, "url_traps", UrlTrapDetector(threshold=3)),
+            mock.patch.object(scraper, "page_fingerprints", SimHashIndex(os.path.join(directory, "fingerprints.bin"))),
+            mock.patch.object(scraper, "similarity_mode", "template"),
+            mock.patch.object(scraper, "duplicate_distance", 3),
+            mock.patch.object(scraper, "duplicate_links", True),
+            mock.patch.object(scraper, "store_link"),
+            mock.patch.object(scraper, "store_word_to_url_frequency"),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def test_near_duplicate_trap_pages_reach_the_threshold(self):
+        tokens = {f"word{i}": 1 for i in range(50)}
+        day = "https://www.ics.uci.edu/calendar/2021-06-{:02d}"
+        for i in range(1, 5):
+            # every day page has the same text and links to the next day
+            self.assertTrue(scraper.is_valid(day.format(i)))
+            links = scraper.store_page_content(day.format(i), [day.format(i + 1)], tokens, len(tokens))
+        self.assertEqual(links, [])
+        self.assertFalse(scraper.is_valid(day.format(6)))
+        scraper.store_link.assert_called_once_with(day.format(1), len(tokens))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+import os
+import shutil
+import tempfile
+import unittest
+from configparser import ConfigParser
+
+from utils.config import Config
+from utils.page_store import read_pages
+from utils.token_index import TokenIndex
+from benchmarks.cache_server import CacheServer
+from crawler.worker import Worker
+from crawler.shards import ShardedCrawler
+
+HOSTS = ["a", "b", "c", "d"]
+
+
+def pages(url):
+    # page n of every host links to page n + 1 of every host, up to 5
+    number = int(url.rstrip("/").rpartition("/")[2])
+    links = "".join(f'<a href="https://{host}.ics.uci.edu/{number + 1}">l</a>' for host in HOSTS) if number < 5 else ""
+    return 200, f"<html><body><p>page {number} of {url}</p>{links}</body></html>".encode()
+
+
+def failing_worker(worker_id, config, frontier):
+    if frontier.shard == 1:
+        raise RuntimeError("worker failed to start")
+    return Worker(worker_id, config, frontier)
+
+
+class ShardedCrawlerTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        server = CacheServer(pages).start()
+        cparser = ConfigParser()
+        cparser.read("config.ini")
+        cparser["LOCAL PROPERTIES"]["SAVE"] = os.path.join(directory, "frontier.save")
+        cparser["LOCAL PROPERTIES"]["DATA"] = os.path.join(directory, "data")
+        cparser["LOCAL PROPERTIES"]["THREADCOUNT"] = "2"
+        cparser["LOCAL PROPERTIES"]["PARSEPROCESSES"] = "0"
+        cparser["LOCAL PROPERTIES"]["STATSINTERVAL"] = "0"
+        cparser["CRAWLER"]["POLITENESS"] = "0.0"
+        cparser["CRAWLER"]["ROBOTS"] = "false"
+        cparser["CRAWLER"]["SEEDURL"] = "https://a.ics.uci.edu/0"
+        self.config = Config(cparser)
+        self.config.cache_server = server.address
+
+    def stored(self):
+        return read_pages(self.config.pages_log, self.config.urls_file)
+
+    def token_count(self, token):
+        return dict(TokenIndex(self.config.token_index_dir).totals()).get(token)
+
+    def test_resume_keeps_the_data_of_an_interrupted_crawl(self):
+        ShardedCrawler(self.config, True, 2).start()
+        stored = self.stored()
+        self.assertEqual(len(stored), 1 + 5 * len(HOSTS))
+        self.assertEqual(self.token_count("page"), len(stored))
+        # as if interrupted before merge_shards: only the shards hold the pages
+        os.remove(self.config.pages_log)
+        os.remove(self.config.urls_file)
+        ShardedCrawler(self.config, False, 2).start()
+        self.assertEqual(self.stored(), stored)
+        self.assertEqual(self.token_count("page"), len(stored))
+
+    def test_a_failed_process_stops_the_crawl(self):
+        with self.assertRaises(RuntimeError):
+            ShardedCrawler(self.config, True, 2, failing_worker).start()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,48 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from utils import token_index
+from utils.token_index import TokenIndex
+
+
+class TokenIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def build(self, pages):
+        index = TokenIndex(self.directory, memory_budget=1)     # a segment per page
+        for page in range(pages):
+            index.add(f"https://www.ics.uci.edu/{page}", {"crawler": 1, f"page{page}": 2})
+        return index
+
+    def test_merge_cut_short_after_the_rename_counts_segments_once(self):
+        index = self.build(3)
+        index.merge()
+        for page in range(3, 6):
+            index.add(f"https://www.ics.uci.edu/{page}", {"crawler": 1})
+        with mock.patch.object(token_index.os, "remove", side_effect=OSError("crash")):
+            with self.assertRaises(OSError):
+                index.merge()     # renamed the new index, kept the old one and the segments
+        self.assertEqual(len([name for name in os.listdir(self.directory) if name.endswith(".bin")]), 2)
+
+        reopened = TokenIndex(self.directory)
+        self.assertEqual(dict(reopened.totals())["crawler"], 6)
+        self.assertEqual(sorted(os.listdir(self.directory)), ["index.5.bin", "urls.txt"])
+
+    def test_segments_after_the_index_are_kept(self):
+        index = self.build(4)
+        index.merge()
+        index.add("https://www.ics.uci.edu/4", {"crawler": 1})
+        reopened = TokenIndex(self.directory)
+        self.assertEqual(dict(reopened.totals()), {"crawler": 5, "page0": 2, "page1": 2, "page2": 2, "page3": 2})
+        reopened.add("https://www.ics.uci.edu/5", {"crawler": 1})
+        reopened.spill()
+        self.assertEqual(dict(TokenIndex(self.directory).totals())["crawler"], 6)
+
+
+if __name__ == "__main__":
+    unittest.main()
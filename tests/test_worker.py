@@ -0,0 +1,107 @@
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+import pickle
+import requests
+
+import scraper
+from crawler import worker
+from crawler.worker import Worker, PoolWorker
+from utils.response import Response
+from utils.robots import RobotsCache, ROBOTS_ATTEMPTS
+from benchmarks.cache_server import raw_response
+
+
+class OneUrlFrontier(object):
+    def __init__(self):
+        self.urls = ["https://www.ics.uci.edu/a"]
+        self.completed = list()
+
+    def get_tbd_url(self):
+        return self.urls.pop() if self.urls else None
+
+    def mark_url_complete(self, url):
+        self.completed.append(url)
+
+    def defer_url(self, url):
+        self.urls.append(url)
+
+    def observe(self, url, status, productive, latency):
+        self.observed = productive
+
+    def add_urls(self, urls, depth=None):
+        self.added = list(urls)
+        return len(urls)
+
+
+class WorkerTest(unittest.TestCase):
+    def run_worker(self, worker_class, download=None):
+        frontier = OneUrlFrontier()
+        config = SimpleNamespace(cache_server=("127.0.0.1", 0), parse_processes=1, parse_queue=1)
+        if download is None:
+            download = mock.Mock(side_effect=requests.exceptions.ChunkedEncodingError())
+        with mock.patch.object(worker, "download", download), mock.patch.object(worker, "get_parse_pool"):
+            worker_thread = worker_class(0, config, frontier)
+            worker_thread.start()
+            worker_thread.join(5)
+        self.assertFalse(worker_thread.is_alive())
+        return frontier
+
+    def test_failed_download_still_completes_the_url(self):
+        self.assertEqual(self.run_worker(Worker).completed, ["https://www.ics.uci.edu/a"])
+
+    def test_pool_worker_failed_download_still_completes_the_url(self):
+        self.assertEqual(self.run_worker(PoolWorker).completed, ["https://www.ics.uci.edu/a"])
+
+    def test_robots_txt_is_read_in_the_urls_turn(self):
+        robots_txt = b"User-agent: *\nDisallow: /a\nSitemap: https://www.ics.uci.edu/sitemap.xml.gz\n"
+        download = mock.Mock(return_value=SimpleNamespace(
+            url="https://www.ics.uci.edu/robots.txt", status=200, body=memoryview(robots_txt), latency=0.1))
+        for worker_class in (Worker, PoolWorker):
+            with self.subTest(worker_class.__name__), mock.patch.object(scraper, "robots", RobotsCache(enabled=True)):
+                frontier = self.run_worker(worker_class, download)
+                # deferred for its robots.txt, then disallowed by it without a download
+                self.assertEqual(frontier.completed, ["https://www.ics.uci.edu/a"])
+                self.assertEqual(frontier.added, ["https://www.ics.uci.edu/sitemap.xml.gz"])
+                download.assert_called_once()
+                self.assertEqual(download.call_args[0][0], "https://www.ics.uci.edu/robots.txt")
+            download.reset_mock()
+
+    def test_urls_of_a_host_with_unreachable_robots_txt_wait(self):
+        download = mock.Mock(return_value=SimpleNamespace(
+            url="https://www.ics.uci.edu/robots.txt", status=None, body=None, latency=None))
+        robots = RobotsCache(enabled=True)
+        frontier = OneUrlFrontier()
+        frontier.defer_url = mock.Mock()
+        config = SimpleNamespace(cache_server=("127.0.0.1", 0))
+        with mock.patch.object(worker, "download", download), mock.patch.object(scraper, "robots", robots):
+            for _ in range(ROBOTS_ATTEMPTS + 2):
+                frontier.urls = ["https://www.ics.uci.edu/a"]
+                Worker(0, config, frontier).run()
+        self.assertEqual(frontier.completed, [])
+        self.assertEqual(frontier.defer_url.call_count, ROBOTS_ATTEMPTS + 2)
+        self.assertEqual(download.call_count, ROBOTS_ATTEMPTS)     # then no more tries until it expires
+
+    def crawl(self, url, content):
+        resp = Response({"url": url, "status": 200, "response": pickle.dumps(raw_response(url, 200, content))})
+        frontier = OneUrlFrontier()
+        config = SimpleNamespace(cache_server=("127.0.0.1", 0))
+        with mock.patch.object(worker, "download", return_value=resp), \
+                mock.patch.object(scraper, "is_valid", side_effect=lambda url: "ics.uci.edu" in url):
+            Worker(0, config, frontier).crawl(url)
+        return resp, frontier.observed
+
+    def test_pages_the_scraper_rejects_are_not_unpickled(self):
+        resp, productive = self.crawl("https://example.com/a", b"<html><body>text</body></html>")
+        self.assertFalse(resp.loaded)
+        self.assertIsNone(productive)
+
+    def test_empty_pages_are_unproductive(self):
+        resp, productive = self.crawl("https://www.ics.uci.edu/a", b"")
+        self.assertTrue(resp.loaded)
+        self.assertIs(productive, False)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -5,6 +5,9 @@ from urllib.parse import urlparse
 
 def get_logger(name, filename=None):
     logger = logging.getLogger(name)
+    if logger.handlers:
+        # already set up by an earlier call, more handlers would repeat every line
+        return logger
     logger.setLevel(logging.INFO)
     if not os.path.exists("Logs"):
         os.makedirs("Logs")
@@ -1,4 +1,6 @@
+import os
 import re
+import copy
 
 
 class Config(object):
@@ -9,11 +11,56 @@ class Config(object):
         assert re.match(r"^[a-zA-Z0-9_ ,]+$", self.user_agent), "User agent should not have any special characters outside '_', ',' and 'space'"
         self.threads_count = int(config["LOCAL PROPERTIES"]["THREADCOUNT"])
         self.save_file = config["LOCAL PROPERTIES"]["SAVE"]
+        self.set_data_dir(config["LOCAL PROPERTIES"].get("DATA", "data"))
+        self.persistence = config["LOCAL PROPERTIES"].get("PERSISTENCE", "shelve")
+        self.commit_events = int(config["LOCAL PROPERTIES"].get("COMMITEVENTS", "512"))
+        self.commit_ms = int(config["LOCAL PROPERTIES"].get("COMMITMS", "200"))
+        self.index_budget = int(config["LOCAL PROPERTIES"].get("INDEXBUDGET", "200000"))
+        self.pages_snapshot = float(config["LOCAL PROPERTIES"].get("PAGESNAPSHOT", "60"))
+        self.parse_processes = int(config["LOCAL PROPERTIES"].get("PARSEPROCESSES", "0"))
+        self.parse_queue = int(config["LOCAL PROPERTIES"].get("PARSEQUEUE", "32"))
+        self.stats_interval = float(config["LOCAL PROPERTIES"].get("STATSINTERVAL", "30"))
+        self.stats_port = int(config["LOCAL PROPERTIES"].get("STATSPORT", "0"))
 
         self.host = config["CONNECTION"]["HOST"]
         self.port = int(config["CONNECTION"]["PORT"])
+        self.max_in_flight = int(config["CONNECTION"].get("MAXINFLIGHT", "4"))
+        self.timeout = float(config["CONNECTION"].get("TIMEOUT", "10"))
+        self.retries = int(config["CONNECTION"].get("RETRIES", "3"))
+        self.retry_backoff = float(config["CONNECTION"].get("BACKOFF", "0.5"))
 
         self.seed_urls = config["CRAWLER"]["SEEDURL"].split(",")
         self.time_delay = float(config["CRAWLER"]["POLITENESS"])
+        self.max_delay = float(config["CRAWLER"].get("MAXDELAY", "60"))
+        self.latency_factor = float(config["CRAWLER"].get("LATENCYFACTOR", "1"))
+        self.priority = config["CRAWLER"].get("PRIORITY", "depth,diversity,novelty,indegree")
+        self.similarity_mode = config["CRAWLER"].get("SIMILARITY", "template")
+        self.trap_threshold = int(config["CRAWLER"].get("TRAPTHRESHOLD", "50"))
+        self.duplicate_distance = int(config["CRAWLER"].get("SIMHASHDISTANCE", "3"))
+        self.duplicate_links = config["CRAWLER"].getboolean("DUPLICATELINKS", True)
+        self.robots = config["CRAWLER"].getboolean("ROBOTS", True)
+        self.robots_ttl = float(config["CRAWLER"].get("ROBOTSTTL", "86400"))
+        self.sitemap_urls = int(config["CRAWLER"].get("SITEMAPURLS", "10000"))
+        self.domains = config["CRAWLER"].get(
+            "DOMAINS", "ics.uci.edu,cs.uci.edu,informatics.uci.edu,stat.uci.edu").split(",")
 
-        self.cache_server = None
\ No newline at end of file
+        self.cache_server = None
+
+    def set_data_dir(self, data_dir):
+        self.data_dir = data_dir
+        self.pages_log = os.path.join(data_dir, "pages.log")
+        self.urls_file = os.path.join(data_dir, "urls.json")
+        self.sorted_urls_file = os.path.join(data_dir, "urlsSorted.json")
+        self.token_index_dir = os.path.join(data_dir, "tokenIndex")
+        self.fingerprints_file = os.path.join(data_dir, "fingerprints.bin")
+        self.report_file = os.path.join(data_dir, "report.json")
+
+    def for_shard(self, shard):
+        ''' Copy of the config for one process of a sharded crawl, with its
+        own save file and data folder. '''
+        config = copy.copy(self)
+        config.save_file = f"{self.save_file}.shard{shard}"
+        config.set_data_dir(os.path.join(self.data_dir, f"shard{shard}"))
+        if self.stats_port:
+            config.stats_port = self.stats_port + shard     # one metrics endpoint per process
+        return config
\ No newline at end of file
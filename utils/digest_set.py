@@ -0,0 +1,93 @@
+import os
+import mmap
+import struct
+
+# File header: magic, number of digests, number of slots.
+HEADER = struct.Struct("<8sQQ")
+MAGIC = b"DIGESTS1"
+DIGEST_SIZE = 16
+EMPTY = bytes(DIGEST_SIZE)
+
+
+class DigestSet(object):
+    ''' Set of 16 byte digests in an open addressing (linear probing) table
+    stored in a file and mmap'd, so opening it is O(1) regardless of size.
+    The table doubles once it is half full. '''
+
+    def __init__(self, filename, capacity=1 << 16):
+        self.filename = filename
+        if not os.path.exists(filename):
+            self._create(filename, capacity)
+        self._map(filename)
+
+    @staticmethod
+    def _create(filename, capacity):
+        with open(filename, "wb") as file:
+            file.write(HEADER.pack(MAGIC, 0, capacity))
+            file.truncate(HEADER.size + capacity * DIGEST_SIZE)
+
+    def _map(self, filename):
+        self.file = open(filename, "r+b")
+        self.table = mmap.mmap(self.file.fileno(), 0)
+        magic, self.count, self.capacity = HEADER.unpack_from(self.table, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{filename} is not a digest set.")
+        self.mask = self.capacity - 1
+
+    def __len__(self):
+        return self.count
+
+    def _find(self, digest):
+        ''' Returns (offset of digest's slot or of the empty slot ending its probe, found). '''
+        table = self.table
+        slot = int.from_bytes(digest[:8], "little") & self.mask
+        while True:
+            offset = HEADER.size + slot * DIGEST_SIZE
+            entry = table[offset:offset + DIGEST_SIZE]
+            if entry == digest:
+                return offset, True
+            if entry == EMPTY:
+                return offset, False
+            slot = (slot + 1) & self.mask
+
+    def __contains__(self, digest):
+        return self._find(digest)[1]
+
+    def add(self, digest):
+        ''' Adds digest, returns False if it was already there. '''
+        offset, found = self._find(digest)
+        if found:
+            return False
+        self.table[offset:offset + DIGEST_SIZE] = digest
+        self.count += 1
+        HEADER.pack_into(self.table, 0, MAGIC, self.count, self.capacity)
+        if self.count * 2 > self.capacity:
+            self._grow()
+        return True
+
+    def __iter__(self):
+        table = self.table
+        for offset in range(HEADER.size, len(table), DIGEST_SIZE):
+            entry = table[offset:offset + DIGEST_SIZE]
+            if entry != EMPTY:
+                yield entry
+
+    def _grow(self):
+        tmp_file = f"{self.filename}.tmp"
+        if os.path.exists(tmp_file):
+            os.remove(tmp_file)
+        bigger = DigestSet(tmp_file, self.capacity * 2)
+        for digest in self:
+            bigger.add(digest)
+        bigger.close()
+        self.close()
+        os.replace(tmp_file, self.filename)
+        self._map(self.filename)
+
+    def flush(self):
+        self.table.flush()
+
+    def close(self):
+        self.table.flush()
+        self.table.close()
+        self.file.close()
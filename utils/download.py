@@ -1,21 +1,94 @@
 import requests
-import cbor
 import time
 
+from threading import Lock, BoundedSemaphore
+from requests.adapters import HTTPAdapter
+
 from utils.response import Response
 
-def download(url, config, logger=None):
-    host, port = config.cache_server
-    resp = requests.get(
-        f"http://{host}:{port}/",
-        params=[("q", f"{url}"), ("u", f"{config.user_agent}")])
+# Errors of a request worth retrying; any other requests error fails the download right away.
+TRANSIENT_ERRORS = (requests.Timeout, requests.ConnectionError, requests.exceptions.ChunkedEncodingError)
+
+
+class Downloader(object):
+    ''' Downloads through the cache server over a pool of keep-alive connections.
+
+    At most `config.max_in_flight` requests are sent at once (workers wait
+    for a free connection), each with `config.timeout` seconds to respond.
+    The returned Response's `latency` is how long its last attempt took to
+    be answered, without the wait for a connection or the retry backoff.
+    Timeouts, connection errors, cut off responses and 5xx responses are
+    retried `config.retries` times with exponential backoff. Every failure
+    ends as an error Response, no requests exception escapes. '''
+
+    def __init__(self, config):
+        self.config = config
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=1, pool_maxsize=config.max_in_flight, pool_block=True)
+        self.session.mount("http://", adapter)
+        # held while a request is sent, so the pool itself never makes a request wait
+        self.connections = BoundedSemaphore(config.max_in_flight)
+
+    def download(self, url, logger=None):
+        host, port = self.config.cache_server
+        for attempt in range(self.config.retries + 1):
+            if attempt:
+                time.sleep(self.config.retry_backoff * 2 ** (attempt - 1))
+            self.connections.acquire()
+            started = time.perf_counter()
+            try:
+                resp = self.session.get(
+                    f"http://{host}:{port}/",
+                    params=[("q", f"{url}"), ("u", f"{self.config.user_agent}")],
+                    timeout=self.config.timeout)
+            except TRANSIENT_ERRORS as e:
+                error = e
+                continue
+            except requests.RequestException as e:     # bad url, redirect loop, undecodable body...
+                error = e
+                break
+            finally:
+                latency = time.perf_counter() - started
+                self.connections.release()
+            if resp.status_code < 500:
+                response = to_response(resp, url, logger)
+                response.latency = latency
+                return response
+            error = f"status {resp.status_code}"
+        if logger:
+            logger.error(f"Download of {url} failed after {attempt + 1} attempts: {error}.")
+        response = Response({
+            "error": f"Download failed after {attempt + 1} attempts: {error}.",
+            "status": resp.status_code if isinstance(error, str) else None,
+            "url": url})
+        response.latency = latency
+        return response
+
+def to_response(resp, url, logger=None):
     try:
         if resp and resp.content:
-            return Response(cbor.loads(resp.content))
+            return Response.from_cbor(resp.content)
     except (EOFError, ValueError) as e:
         pass
-    logger.error(f"Spacetime Response error {resp} with url {url}.")
+    if logger:
+        logger.error(f"Spacetime Response error {resp} with url {url}.")
     return Response({
         "error": f"Spacetime Response error {resp} with url {url}.",
         "status": resp.status_code,
         "url": url})
+
+
+downloaders = dict()    # cache server -> Downloader shared by all workers
+downloaders_lock = Lock()
+
+
+def get_downloader(config):
+    with downloaders_lock:
+        if config.cache_server not in downloaders:
+            downloaders[config.cache_server] = Downloader(config)
+        return downloaders[config.cache_server]
+
+
+def download(url, config, logger=None):
+    return get_downloader(config).download(url, logger)
@@ -0,0 +1,195 @@
+import json
+import time
+
+from threading import Thread, Lock, Event
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+from utils import get_logger
+
+# Histogram bucket i counts durations of less than 2^i microseconds (the last one: longer).
+BUCKETS = 28
+
+
+class Histogram(object):
+    ''' Durations of one crawl stage in power of two microsecond buckets,
+    so recording is a few integer operations and percentiles are exact to
+    within a factor of 2. '''
+
+    def __init__(self):
+        self.buckets = [0] * BUCKETS
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.lock = Lock()
+
+    def record(self, seconds):
+        bucket = min(int(seconds * 1e6).bit_length(), BUCKETS - 1)
+        with self.lock:
+            self.buckets[bucket] += 1
+            self.count += 1
+            self.total += seconds
+            if seconds > self.max:
+                self.max = seconds
+
+    def percentile(self, fraction):
+        ''' Upper bound (seconds) of the bucket holding the given fraction of durations. '''
+        with self.lock:
+            rank = fraction * self.count
+            seen = 0
+            for bucket, count in enumerate(self.buckets):
+                seen += count
+                if count and seen >= rank:
+                    return min((1 << bucket) / 1e6, self.max)
+        return 0.0
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total / self.count * 1000, 3) if self.count else 0.0,
+            "p50_ms": round(self.percentile(0.5) * 1000, 3),
+            "p99_ms": round(self.percentile(0.99) * 1000, 3),
+            "max_ms": round(self.max * 1000, 3),
+            "total_s": round(self.total, 3)}
+
+
+class Timer(object):
+    __slots__ = ("histogram", "start")
+
+    def __init__(self, histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.record(time.perf_counter() - self.start)
+
+
+class Metrics(object):
+    ''' Stage timings, counters and gauges of the crawl, shared by all threads.
+        with metrics.time("download"): ...
+        metrics.count("pages")
+        metrics.gauge("frontier", frontier.stats)   # called when a snapshot is taken
+    '''
+
+    def __init__(self):
+        self.histograms = dict()
+        self.counters = dict()
+        self.gauges = dict()
+        self.lock = Lock()
+        self.started = time.monotonic()
+
+    def histogram(self, name):
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            with self.lock:
+                histogram = self.histograms.setdefault(name, Histogram())
+        return histogram
+
+    def time(self, name):
+        return Timer(self.histogram(name))
+
+    def observe(self, name, seconds):
+        self.histogram(name).record(seconds)
+
+    def count(self, name, amount=1):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def gauge(self, name, function):
+        self.gauges[name] = function
+
+    def snapshot(self):
+        uptime = time.monotonic() - self.started
+        with self.lock:
+            counters = dict(self.counters)
+            histograms = dict(self.histograms)
+        gauges = dict()
+        for name, function in list(self.gauges.items()):
+            try:
+                gauges[name] = function()
+            except Exception as error:     # e.g. a closed frontier, keep reporting the rest
+                gauges[name] = repr(error)
+        return {
+            "uptime_s": round(uptime, 1),
+            "pages_per_sec": round(counters.get("pages", 0) / uptime, 2) if uptime else 0.0,
+            "counters": counters,
+            "gauges": gauges,
+            "stages": {name: histogram.summary() for name, histogram in sorted(histograms.items())}}
+
+
+# the metrics of this process, filled in by the workers, scraper and frontier
+metrics = Metrics()
+
+
+class StatsReporter(object):
+    ''' Logs a summary of the metrics every `interval` seconds (Logs/STATS.log). '''
+
+    def __init__(self, interval, registry=metrics):
+        self.interval = interval
+        self.metrics = registry
+        self.logger = get_logger("STATS")
+        self.stopped = Event()
+        self.thread = Thread(target=self._loop, daemon=True)
+        self.last_pages = 0
+        self.last_time = time.monotonic()
+
+    def start(self):
+        self.thread.start()
+
+    def _loop(self):
+        while not self.stopped.wait(self.interval):
+            self.log()
+
+    def log(self):
+        snapshot = self.metrics.snapshot()
+        now = time.monotonic()
+        pages = snapshot["counters"].get("pages", 0)
+        rate = (pages - self.last_pages) / (now - self.last_time) if now > self.last_time else 0.0
+        self.last_pages, self.last_time = pages, now
+        stages = ", ".join(
+            f"{name} p50 {stage['p50_ms']}ms p99 {stage['p99_ms']}ms"
+            for name, stage in snapshot["stages"].items())
+        self.logger.info(
+            f"{pages} pages, {rate:.1f} pages/sec (overall {snapshot['pages_per_sec']}), "
+            f"{json.dumps(snapshot['gauges'])}; {stages}")
+
+    def stop(self):
+        self.stopped.set()
+        self.thread.join()
+        self.log()
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        body = json.dumps(self.server.metrics.snapshot(), indent=4).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass    # keep requests to the endpoint out of the crawl's output
+
+
+class MetricsServer(object):
+    ''' Serves the metrics as JSON on http://127.0.0.1:`port`/ while the crawl runs. '''
+
+    def __init__(self, port, registry=metrics):
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), MetricsHandler)
+        self.server.daemon_threads = True
+        self.server.metrics = registry
+        self.thread = Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def address(self):
+        return self.server.server_address
+
+    def start(self):
+        self.thread.start()
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
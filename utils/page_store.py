@@ -0,0 +1,190 @@
+'''
+Store of {url : word count} for every page the scraper stored.
+
+    Converts the store to data/urls.json and data/urlsSorted.json:
+        python -m utils.page_store --config_file config.ini
+'''
+import os
+import json
+import time
+import atexit
+import struct
+
+from threading import Thread, RLock, Lock, Event
+from configparser import ConfigParser
+from argparse import ArgumentParser
+
+from utils.config import Config
+from utils.url_index import SortedUrlIndex
+
+# Log record: 4 byte word count, 4 byte url length, utf-8 url.
+RECORD = struct.Struct("<II")
+
+
+def encode_page(url, word_count):
+    encoded = url.encode("utf-8")
+    return RECORD.pack(word_count, len(encoded)) + encoded
+
+
+def read_log(log_file, pages):
+    ''' Adds the pages of log_file to pages, truncating a torn last record. '''
+    with open(log_file, "r+b") as file:
+        data = file.read()
+        offset = 0
+        while offset + RECORD.size <= len(data):
+            word_count, length = RECORD.unpack_from(data, offset)
+            end = offset + RECORD.size + length
+            if end > len(data):
+                break
+            pages[data[offset + RECORD.size:end].decode("utf-8")] = word_count
+            offset = end
+        if offset != len(data):
+            file.truncate(offset)
+    return pages
+
+
+def read_pages(log_file, urls_file):
+    ''' {url : word count} in the order stored, from the log, or from
+    urls.json when there is no log yet (crawls from before the log). '''
+    if os.path.exists(log_file):
+        return read_log(log_file, dict())
+    if os.path.exists(urls_file):
+        with open(urls_file, "r") as file:
+            return json.load(file)
+    return dict()
+
+
+def write_atomic(filename, mode, write):
+    tmp_file = f"{filename}.tmp"
+    with open(tmp_file, mode) as file:
+        write(file)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(tmp_file, filename)
+
+
+def write_log(pages, log_file):
+    write_atomic(log_file, "wb", lambda file: file.write(
+        b"".join(encode_page(url, word_count) for url, word_count in pages.items())))
+
+
+def write_json(pages, urls_file, sorted_urls_file, sorted_urls=None):
+    ''' Writes pages in the layout of data/urls.json and data/urlsSorted.json. '''
+    write_atomic(urls_file, "w", lambda file: json.dump(pages, file, indent=4))
+    if sorted_urls is None:
+        sorted_urls = sorted(pages)
+    write_atomic(sorted_urls_file, "w", lambda file: json.dump({"urls": sorted_urls}, file, indent=4))
+
+
+class PageStore(object):
+    ''' {url : word count} of the stored pages, in memory and in an
+    append-only log (`log_file`), plus the urls in a SortedUrlIndex.
+
+    Storing a page costs a dict insert, an insert into one block of the
+    sorted index and a buffered record, whatever the size of the crawl.
+    A background thread appends the buffered records to the log every
+    `flush_interval` seconds, and every `snapshot_interval` seconds (and at
+    exit) atomically rewrites urls.json and urlsSorted.json from memory, so
+    the report and older tools keep working. Loaded lazily on first use. '''
+
+    def __init__(self, log_file, urls_file, sorted_urls_file, flush_interval=1.0, snapshot_interval=60.0):
+        self.log_file = log_file
+        self.urls_file = urls_file
+        self.sorted_urls_file = sorted_urls_file
+        self.flush_interval = flush_interval
+        self.snapshot_interval = snapshot_interval
+        self.pages = None       # url -> word count, loaded lazily
+        self.sorted_urls = SortedUrlIndex(self.urls)
+        self.buffered = list()  # encoded records not yet in the log
+        self.log = None
+        self.changed = False    # pages added since the last snapshot
+        self.last_snapshot = time.monotonic()
+        self.lock = RLock()
+        self.flush_lock = Lock()    # one writer of the files at a time
+        self.stopped = Event()
+
+    def _load(self):
+        if self.pages is not None:
+            return
+        with self.lock:
+            if self.pages is not None:
+                return
+            pages = read_pages(self.log_file, self.urls_file)
+            if not os.path.exists(self.log_file):
+                write_log(pages, self.log_file)     # first run with the log, start it from urls.json
+            self.log = open(self.log_file, "ab")
+            self.pages = pages
+            Thread(target=self._flush_loop, daemon=True).start()
+            atexit.register(self.flush, True)
+
+    def urls(self):
+        self._load()
+        return list(self.pages)
+
+    def __len__(self):
+        self._load()
+        return len(self.pages)
+
+    def __contains__(self, url):
+        self._load()
+        return url in self.pages
+
+    def items(self):
+        ''' (url, word count) pairs in the order the pages were stored. '''
+        self._load()
+        with self.lock:
+            return list(self.pages.items())
+
+    def add(self, url : str, word_count : int) -> None:
+        self._load()
+        with self.lock:
+            if url not in self.pages:
+                self.sorted_urls.add(url)
+            self.pages[url] = word_count
+            self.buffered.append(encode_page(url, word_count))
+            self.changed = True
+
+    def flush(self, snapshot=False) -> None:
+        ''' Appends the buffered pages to the log, and rewrites the json
+        files if `snapshot` or snapshot_interval has passed. '''
+        if self.pages is None:
+            return
+        with self.flush_lock:
+            with self.lock:
+                records = b"".join(self.buffered)
+                self.buffered.clear()
+            if records:
+                self.log.write(records)
+                self.log.flush()
+                os.fsync(self.log.fileno())
+            if not (snapshot or time.monotonic() - self.last_snapshot >= self.snapshot_interval):
+                return
+            with self.lock:
+                if not self.changed:
+                    return
+                pages = dict(self.pages)
+                sorted_urls = self.sorted_urls.snapshot()
+                self.changed = False
+            self.last_snapshot = time.monotonic()
+            write_json(pages, self.urls_file, self.sorted_urls_file, sorted_urls)
+
+    def _flush_loop(self):
+        while not self.stopped.wait(self.flush_interval):
+            self.flush()
+
+
+def main(config_file):
+    cparser = ConfigParser()
+    cparser.read(config_file)
+    config = Config(cparser)
+    pages = read_pages(config.pages_log, config.urls_file)
+    write_json(pages, config.urls_file, config.sorted_urls_file)
+    print(f"Wrote {len(pages)} pages to {config.urls_file} and {config.sorted_urls_file}.")
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser()
+    parser.add_argument("--config_file", type=str, default="config.ini")
+    args = parser.parse_args()
+
+    main(args.config_file)
@@ -1,14 +1,116 @@
+import cbor
 import pickle
+import struct
+
+# Argument sizes of the CBOR "additional info" values 24-27.
+CBOR_ARGUMENT = {24: struct.Struct(">B"), 25: struct.Struct(">H"), 26: struct.Struct(">I"), 27: struct.Struct(">Q")}
+CBOR_SIMPLE = {20: False, 21: True, 22: None, 23: None}
+
+
+class _Unsupported(Exception):
+    ''' Raised by _cbor_head/_cbor_item on items loads_cbor_map leaves to cbor.loads. '''
+
 
 class Response(object):
+    ''' url, status and error are set right away; the pickled raw response
+    is only unpickled the first time raw_response is read. '''
+
     def __init__(self, resp_dict):
         self.url = resp_dict["url"]
         self.status = resp_dict["status"]
         self.error = resp_dict["error"] if "error" in resp_dict else None
+        self._pickled = resp_dict["response"] if "response" in resp_dict else None
+        self._raw_response = None
+        self._unpickled = False
+        self.latency = None     # seconds the cache server took to answer, set by utils.download
+
+    @classmethod
+    def from_cbor(cls, payload):
+        ''' Builds a Response from the cache server's CBOR bytes without
+        copying the pickled raw response out of them. '''
+        return cls(loads_cbor_map(payload))
+
+    @property
+    def raw_response(self):
+        if not self._unpickled:
+            try:
+                self._raw_response = (
+                    pickle.loads(self._pickled)
+                    if self._pickled is not None else
+                    None)
+            except TypeError:
+                self._raw_response = None
+            self._pickled = None
+            self._unpickled = True
+        return self._raw_response
+
+    @property
+    def loaded(self):
+        ''' Whether raw_response was read (and unpickled) already. '''
+        return self._unpickled
+
+    @property
+    def body(self):
+        ''' The page content as a memoryview (no copy), or None. '''
+        raw_response = self.raw_response
+        if raw_response is None or raw_response.content is None:
+            return None
+        return memoryview(raw_response.content)
+
+
+def loads_cbor_map(payload):
+    ''' Decodes a CBOR map of simple values, like the cache server sends.
+    Byte strings are returned as memoryview slices of payload. Anything
+    else (nested items, floats, indefinite lengths) falls back to cbor.loads.
+    A truncated payload raises ValueError either way. '''
+    view = memoryview(payload)
+    try:
+        count, offset = _cbor_head(view, 0, 5)
+        values = dict()
+        for _ in range(count):
+            key, offset = _cbor_item(view, offset)
+            values[key], offset = _cbor_item(view, offset)
+        if offset != len(view):
+            raise ValueError("Trailing bytes after CBOR map.")
+        return values
+    except _Unsupported:
         try:
-            self.raw_response = (
-                pickle.loads(resp_dict["response"])
-                if "response" in resp_dict else
-                None)
-        except TypeError:
-            self.raw_response = None
+            return cbor.loads(bytes(payload))
+        except (LookupError, EOFError):     # the C extension's "buffer exhausted"
+            raise ValueError("Truncated CBOR payload.")
+    except (IndexError, struct.error):
+        raise ValueError("Truncated CBOR payload.")
+
+
+def _cbor_head(view, offset, major=None):
+    initial = view[offset]
+    if major is not None and initial >> 5 != major:
+        raise _Unsupported
+    info = initial & 0x1f
+    if info < 24:
+        return info, offset + 1
+    if info not in CBOR_ARGUMENT:
+        raise _Unsupported   # indefinite length or reserved
+    argument = CBOR_ARGUMENT[info]
+    return argument.unpack_from(view, offset + 1)[0], offset + 1 + argument.size
+
+
+def _cbor_item(view, offset):
+    major = view[offset] >> 5
+    info = view[offset] & 0x1f
+    if major == 7:
+        if info not in CBOR_SIMPLE:
+            raise _Unsupported   # floats and other simple values
+        return CBOR_SIMPLE[info], offset + 1
+    value, offset = _cbor_head(view, offset)
+    if major == 0:
+        return value, offset
+    if major == 1:
+        return -1 - value, offset
+    if major in (2, 3):
+        end = offset + value
+        if end > len(view):
+            raise IndexError
+        data = view[offset:end]
+        return (data if major == 2 else str(data, "utf-8")), end
+    raise _Unsupported   # arrays, maps and tags
@@ -0,0 +1,296 @@
+import io
+import re
+import gzip
+import time
+import lxml.etree
+
+from collections import OrderedDict
+from threading import Lock
+from urllib.parse import urlparse
+
+from utils import normalize
+from utils.metrics import metrics
+
+# Bytes of a robots.txt that are parsed, the rest is ignored (RFC 9309 asks for at least 500 KiB).
+MAX_ROBOTS_BYTES = 512 * 1024
+# Failed downloads (or 5xx) of a host's robots.txt, in the host's turns, before it counts as unreachable.
+ROBOTS_ATTEMPTS = 3
+# Seconds an unreachable robots.txt keeps its host disallowed before it is tried again.
+UNREACHABLE_TTL = 600.0
+# Hosts whose rules are cached at most, the oldest are evicted first.
+MAX_HOSTS = 10000
+
+
+class PathMatcher(object):
+    ''' Finds the longest robots.txt path pattern matching a path.
+
+    Plain patterns are prefixes, kept in a set: the longest match takes one
+    set lookup of the path's prefix per distinct pattern length, longest
+    first. Only patterns with a * or a trailing $ are compiled to regexes,
+    and only tried if they are longer than the best plain match. '''
+
+    def __init__(self, patterns):
+        plain = set(pattern for pattern in patterns if "*" not in pattern and not pattern.endswith("$"))
+        self.prefixes = frozenset(plain)
+        self.lengths = sorted(set(len(prefix) for prefix in plain), reverse=True)
+        self.wildcards = sorted(
+            ((len(pattern), compile_pattern(pattern)) for pattern in set(patterns) - plain),
+            key=lambda item: item[0], reverse=True)
+
+    def longest(self, path):
+        ''' Length of the longest pattern matching path, -1 if none does. '''
+        best = -1
+        for length in self.lengths:
+            if length <= len(path) and path[:length] in self.prefixes:
+                best = length
+                break
+        for length, regex in self.wildcards:
+            if length <= best:
+                break
+            if regex.match(path):
+                return length
+        return best
+
+
+def compile_pattern(pattern):
+    ''' Regex of a robots.txt pattern: * matches anything, a trailing $ the end of the path. '''
+    anchored = pattern.endswith("$")
+    if anchored:
+        pattern = pattern[:-1]
+    regex = ".*".join(re.escape(part) for part in pattern.split("*"))
+    return re.compile(regex + ("$" if anchored else ""), re.DOTALL)
+
+
+class RobotsRules(object):
+    ''' The robots.txt rules of one host that apply to this crawler. A path
+    is allowed unless its longest matching rule is a Disallow (an Allow of
+    the same length wins), as in RFC 9309. '''
+
+    def __init__(self, allow=(), disallow=(), crawl_delay=0.0, sitemaps=()):
+        self.allow = PathMatcher(allow)
+        self.disallow = PathMatcher(disallow)
+        self.crawl_delay = crawl_delay
+        self.sitemaps = list(sitemaps)
+
+    def allowed(self, path):
+        disallowed = self.disallow.longest(path)
+        return disallowed < 0 or self.allow.longest(path) >= disallowed
+
+
+ALLOW_ALL = RobotsRules()
+DISALLOW_ALL = RobotsRules(disallow=["/"])
+UNREACHABLE = RobotsRules(disallow=["/"])   # cached for a host whose robots.txt could not be downloaded
+
+
+'''
+Parses a robots.txt into the rules for user_agent: the groups naming one of
+its product tokens, or else the * groups.
+    Params:
+        content (bytes): robots.txt content
+        user_agent (str): this crawler's user agent
+    Returns:
+        rules (RobotsRules): allow/disallow rules, crawl-delay and sitemaps
+'''
+def parse_robots(content, user_agent) -> RobotsRules:
+    user_agent = user_agent.lower()
+    groups = list()         # (agents, allow, disallow, crawl delays)
+    sitemaps = list()
+    group = None
+    for line in content[:MAX_ROBOTS_BYTES].decode("utf-8", errors="replace").splitlines():
+        key, _, value = line.partition("#")[0].partition(":")
+        key = key.strip().lower()
+        value = value.strip()
+        if key == "sitemap":
+            if value:
+                sitemaps.append(value)
+        elif key == "user-agent":
+            if group is None or group[1] or group[2] or group[3]:    # rules ended the previous group
+                group = (list(), list(), list(), list())
+                groups.append(group)
+            group[0].append(value.lower())
+        elif group is None or not value:    # rules before any user-agent, or an empty Disallow
+            continue
+        elif key == "allow":
+            group[1].append(value)
+        elif key == "disallow":
+            group[2].append(value)
+        elif key == "crawl-delay":
+            try:
+                group[3].append(float(value))
+            except ValueError:
+                pass
+
+    matching = [group for group in groups
+                if any(agent and agent != "*" and agent in user_agent for agent in group[0])]
+    if not matching:
+        matching = [group for group in groups if "*" in group[0]]
+    return RobotsRules(
+        allow=[pattern for group in matching for pattern in group[1]],
+        disallow=[pattern for group in matching for pattern in group[2]],
+        crawl_delay=max((delay for group in matching for delay in group[3]), default=0.0),
+        sitemaps=sitemaps)
+
+
+'''
+Streams the <loc> urls out of a sitemap or sitemap index, gzipped or not.
+Each <url> or <sitemap> element is freed once read, so memory does not grow
+with the number of urls in the file.
+    Params:
+        content (bytes): sitemap xml
+    Returns:
+        (kind: str, url: str) pairs: "url" for a page, "sitemap" for a sitemap listed by an index
+'''
+def iter_sitemap(content):
+    source = io.BytesIO(content)
+    if content[:2] == b"\x1f\x8b":      # .xml.gz
+        source = gzip.GzipFile(fileobj=source)
+    try:
+        for _, element in lxml.etree.iterparse(
+                source, events=("end",), tag=("{*}url", "{*}sitemap"),
+                resolve_entities=False, no_network=True):
+            loc = element.findtext("{*}loc")
+            if loc and loc.strip():
+                yield lxml.etree.QName(element).localname, loc.strip()
+            element.clear()
+            while element.getprevious() is not None:    # drop the elements read before it
+                del element.getparent()[0]
+    except (lxml.etree.XMLSyntaxError, OSError, EOFError):
+        return      # truncated or not xml, keep the urls read so far
+
+
+class RobotsCache(object):
+    ''' robots.txt rules per host (scheme and authority), kept for `ttl`
+    seconds after they were downloaded.
+
+    Nothing here downloads: a worker that is handed a url of a host whose
+    rules are not cached downloads the host's robots_url in the url's place,
+    in the host's turn of the HostScheduler (so politeness, Crawl-delay and
+    backoff apply to it), and gives the Response to load(). A robots.txt
+    that is missing (any other status than 200 or 5xx) allows everything.
+    One that cannot be downloaded or answers 5xx is tried again in the
+    host's next turns; after ROBOTS_ATTEMPTS failures the host is treated
+    as disallowed for UNREACHABLE_TTL seconds, as RFC 9309 asks: its urls
+    wait in the frontier until then (see unreachable_for), and are not
+    dropped. Entries are kept oldest first and evicted once expired, or
+    when more than `max_hosts` are cached. The sitemaps listed in robots.txt
+    files and in sitemap indexes are remembered, so workers know which urls
+    to read as sitemaps. With `enabled` False robots.txt is not used. '''
+
+    def __init__(self, enabled=False, user_agent="*", ttl=86400.0, sitemap_urls=10000, max_hosts=MAX_HOSTS):
+        self.enabled = enabled
+        self.user_agent = user_agent
+        self.ttl = ttl
+        self.sitemap_urls = sitemap_urls    # urls taken from the sitemaps of one host at most
+        self.max_hosts = max_hosts
+        self.cache = OrderedDict()          # (scheme, netloc) -> (expires, RobotsRules), oldest first
+        self.failures = dict()              # (scheme, netloc) -> failed downloads of its robots.txt in a row
+        self.sitemap_counts = dict()        # host -> urls taken from its sitemaps
+        self.sitemaps = set()               # sitemaps listed so far, normalized like frontier urls
+        self.lock = Lock()
+
+    @staticmethod
+    def _key(parsed):
+        return parsed.scheme, parsed.netloc
+
+    @staticmethod
+    def _path(parsed):
+        path = parsed.path or "/"
+        return f"{path}?{parsed.query}" if parsed.query else path
+
+    def _cached(self, key):
+        with self.lock:
+            entry = self.cache.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            return entry[1]
+        return None
+
+    def _evict(self, now):
+        while self.cache:
+            key, (expires, _) = next(iter(self.cache.items()))
+            if expires > now and len(self.cache) <= self.max_hosts:
+                return
+            del self.cache[key]
+
+    def needs_rules(self, url) -> bool:
+        ''' Whether the robots.txt of url's host has to be downloaded before url. '''
+        return self.enabled and self._cached(self._key(urlparse(url))) is None
+
+    def robots_url(self, url) -> str:
+        parsed = urlparse(url)
+        return f"{parsed.scheme}://{parsed.netloc}/robots.txt"
+
+    def load(self, url, resp) -> list:
+        ''' Caches the rules of url's host from the Response of its robots_url.
+        Returns the sitemaps it lists (none if SITEMAPURLS is 0). '''
+        key = self._key(urlparse(url))
+        if resp.status is None or 500 <= resp.status < 600:
+            with self.lock:
+                failures = self.failures[key] = self.failures.get(key, 0) + 1
+            if failures < ROBOTS_ATTEMPTS:
+                return []       # not cached, the next url of the host tries again
+            rules, ttl = UNREACHABLE, min(self.ttl, UNREACHABLE_TTL)
+        elif resp.status == 200 and resp.body:
+            rules, ttl = parse_robots(bytes(resp.body[:MAX_ROBOTS_BYTES]), self.user_agent), self.ttl
+        else:
+            rules, ttl = ALLOW_ALL, self.ttl
+        now = time.monotonic()
+        with self.lock:
+            self.failures.pop(key, None)
+            self.cache[key] = (now + ttl, rules)
+            self.cache.move_to_end(key)
+            self._evict(now)
+            if self.sitemap_urls <= 0:
+                return []
+            self.sitemaps.update(normalize(sitemap) for sitemap in rules.sitemaps)
+        return rules.sitemaps
+
+    def unreachable_for(self, url) -> float:
+        ''' Seconds until the robots.txt of url's host is tried again, if it
+        could not be downloaded, else 0. '''
+        if not self.enabled:
+            return 0.0
+        with self.lock:
+            entry = self.cache.get(self._key(urlparse(url)))
+        if entry is None or entry[1] is not UNREACHABLE:
+            return 0.0
+        return max(entry[0] - time.monotonic(), 0.0)
+
+    def is_sitemap(self, url) -> bool:
+        ''' Whether url was listed as a sitemap. '''
+        with self.lock:
+            return url in self.sitemaps
+
+    def allowed(self, parsed) -> bool:
+        ''' Whether the cached robots.txt of the host of a urlparse result
+        allows crawling it. Hosts without cached rules, or with an unreachable
+        robots.txt, are allowed: their urls are checked again before they are
+        downloaded (see needs_rules and unreachable_for). '''
+        if not self.enabled:
+            return True
+        rules = self._cached(self._key(parsed))
+        if rules is None or rules is UNREACHABLE or rules.allowed(self._path(parsed)):
+            return True
+        metrics.count("robots_disallowed")
+        return False
+
+    def crawl_delay(self, url) -> float:
+        ''' The Crawl-delay of the url's host if its robots.txt is cached, else 0. '''
+        if not self.enabled:
+            return 0.0
+        rules = self._cached(self._key(urlparse(url)))
+        return rules.crawl_delay if rules is not None else 0.0
+
+    def read_sitemap(self, sitemap_url, content):
+        ''' Yields the (kind, url) pairs of a downloaded sitemap (see
+        iter_sitemap), with up to sitemap_urls page urls per host. '''
+        host = urlparse(sitemap_url).netloc
+        for kind, url in iter_sitemap(content):
+            with self.lock:
+                if kind == "sitemap":
+                    self.sitemaps.add(normalize(url))
+                else:
+                    count = self.sitemap_counts.get(host, 0)
+                    if count >= self.sitemap_urls:
+                        return
+                    self.sitemap_counts[host] = count + 1
+            yield kind, url
@@ -19,8 +19,10 @@ def init(df, user_agent, fresh):
             df.push()
     return reg.load_balancer
 
-def get_cache_server(config, restart):
+def get_cache_server(config, restart, save_files=None):
+    # fresh unless resuming from a save file (config.save_file, or those of a sharded crawl)
+    save_files = save_files if save_files is not None else [config.save_file]
     init_node = Node(
         init, Types=[Register], dataframe=(config.host, config.port))
     return init_node.start(
-        config.user_agent, restart or not os.path.exists(config.save_file))
\ No newline at end of file
+        config.user_agent, restart or not any(os.path.exists(save_file) for save_file in save_files))
\ No newline at end of file
@@ -0,0 +1,121 @@
+import os
+import hashlib
+
+from array import array
+from functools import lru_cache
+from threading import RLock
+
+BITS = 64
+# Each fingerprint bit gets a LANE bit wide slot in one big int, so the
+# weights of all 64 bits are summed with a single multiply-add per token.
+LANE = 40
+LANE_MASK = (1 << LANE) - 1
+# byte -> its 8 bits spread out into lanes
+SPREAD = [sum(((byte >> bit) & 1) << (bit * LANE) for bit in range(8)) for byte in range(256)]
+
+
+@lru_cache(maxsize=1 << 16)
+def token_lanes(token : str) -> int:
+    ''' The 64 bit hash of token, one bit per lane. '''
+    digest = int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest(), "little")
+    lanes = 0
+    for byte in range(8):
+        lanes |= SPREAD[(digest >> (byte * 8)) & 255] << (byte * 8 * LANE)
+    return lanes
+
+
+'''
+Returns the SimHash of a page: bit i is set if the tokens whose hash has bit i
+set outweigh (by count) the tokens whose hash does not. Pages with mostly the
+same tokens get fingerprints that differ in only a few bits.
+    Params:
+        tokens (dict[str]->int): token counts, as returned by scraper.tokenize
+    Returns:
+        fingerprint (int): 64 bit fingerprint, None if there are no tokens
+'''
+def simhash(tokens) -> int:
+    if not tokens:
+        return None
+    weights = 0
+    total = 0
+    for token, count in tokens.items():
+        weights += count * token_lanes(token)
+        total += count
+    fingerprint = 0
+    for bit in range(BITS):
+        if ((weights >> (bit * LANE)) & LANE_MASK) * 2 > total:
+            fingerprint |= 1 << bit
+    return fingerprint
+
+
+class SimHashIndex(object):
+    ''' Fingerprints of the stored pages in a banded LSH index.
+
+    Two fingerprints at most `distance` bits apart agree on at least one of
+    distance + 1 bands, so a page is only compared with the fingerprints that
+    share a band with it instead of with every page seen. Fingerprints are
+    appended to `filename` and loaded lazily on first use. '''
+
+    def __init__(self, filename, distance=3):
+        self.filename = filename
+        self.distance = distance
+        self.bands = None       # per band: band value -> fingerprints, loaded lazily
+        self.file = None
+        self.lock = RLock()
+
+    @property
+    def band_bits(self):
+        return BITS // (self.distance + 1)
+
+    def _band_keys(self, fingerprint):
+        mask = (1 << self.band_bits) - 1
+        return [(fingerprint >> (band * self.band_bits)) & mask for band in range(self.distance + 1)]
+
+    def _load(self):
+        if self.bands is not None:
+            return
+        with self.lock:
+            if self.bands is not None:
+                return
+            self.bands = [dict() for _ in range(self.distance + 1)]
+            fingerprints = array("Q")
+            if os.path.exists(self.filename):
+                with open(self.filename, "rb") as file:
+                    data = file.read()
+                fingerprints.frombytes(data[:len(data) - len(data) % fingerprints.itemsize])
+            for fingerprint in fingerprints:
+                self._index(fingerprint)
+
+    def _index(self, fingerprint):
+        for band, key in zip(self.bands, self._band_keys(fingerprint)):
+            band.setdefault(key, []).append(fingerprint)
+
+    def find(self, fingerprint):
+        ''' Returns a stored fingerprint at most distance bits from fingerprint, or None. '''
+        self._load()
+        with self.lock:
+            for band, key in zip(self.bands, self._band_keys(fingerprint)):
+                for candidate in band.get(key, ()):
+                    if (candidate ^ fingerprint).bit_count() <= self.distance:
+                        return candidate
+        return None
+
+    def add(self, fingerprint) -> bool:
+        ''' Stores fingerprint unless a near-duplicate is already stored.
+        Returns True if it was stored. '''
+        self._load()
+        with self.lock:
+            if self.find(fingerprint) is not None:
+                return False
+            self._index(fingerprint)
+            if self.file is None:
+                self.file = open(self.filename, "ab")
+            self.file.write(array("Q", [fingerprint]).tobytes())
+            self.file.flush()
+            return True
+
+    def close(self):
+        with self.lock:
+            if self.file is not None:
+                self.file.close()
+                self.file = None
@@ -0,0 +1,232 @@
+import os
+import heapq
+import atexit
+import struct
+
+from array import array
+from threading import Thread, Lock, RLock
+
+# Record: 4 byte token length, 4 byte posting count, utf-8 token,
+# then (url id, count) pairs as unsigned 32 bit ints.
+RECORD = struct.Struct("<II")
+MERGE_SEGMENTS = 4      # segments that trigger a background merge into the index
+
+
+def file_number(name):
+    ''' n of a segment "n.seg" or an index "index.n.bin" (the last segment merged
+    into it), -1 for an index.bin written before indexes were numbered. '''
+    parts = os.path.basename(name).split(".")
+    return int(parts[-2]) if parts[-2].isdigit() else -1
+
+
+def write_records(file, records):
+    for token, postings in records:
+        encoded = token.encode("utf-8")
+        file.write(RECORD.pack(len(encoded), len(postings) // 2))
+        file.write(encoded)
+        file.write(postings.tobytes())
+
+
+def read_records(filename):
+    ''' Yields (token, postings array) from a segment or index file, in token order. '''
+    with open(filename, "rb") as file:
+        while True:
+            header = file.read(RECORD.size)
+            if len(header) < RECORD.size:
+                return
+            length, count = RECORD.unpack(header)
+            token = file.read(length).decode("utf-8")
+            postings = array("I")
+            postings.frombytes(file.read(count * 2 * postings.itemsize))
+            yield token, postings
+
+
+def merge_records(sources):
+    ''' Merges token ordered record streams, joining the postings of equal tokens. '''
+    token, postings = None, None
+    for next_token, next_postings in heapq.merge(*sources, key=lambda record: record[0]):
+        if next_token == token:
+            postings.extend(next_postings)
+            continue
+        if token is not None:
+            yield token, postings
+        token, postings = next_token, array("I", next_postings)
+    if token is not None:
+        yield token, postings
+
+
+class TokenIndex(object):
+    ''' Inverted index of token -> [(url id, count)] stored under `directory`.
+
+    Urls are interned to integer ids in urls.txt (line number = id). Postings
+    are buffered in memory and spilled to a sorted segment file once
+    `memory_budget` postings are buffered; a background thread merges the
+    segments into the single index file. Adding a page costs the same no
+    matter how large the index is.
+
+    The index file is named after the last segment merged into it
+    (index.n.bin holds n.seg and every segment before it), so a merge
+    takes effect with the rename of the new index, atomically. Segments
+    and older indexes a crash left behind after that rename are deleted
+    on load instead of being counted twice. '''
+
+    def __init__(self, directory, memory_budget=200000):
+        self.directory = directory
+        self.memory_budget = memory_budget
+        self.url_ids = None     # url -> id, loaded lazily
+        self.buffer = dict()    # token -> array of url id, count pairs
+        self.buffered = 0       # postings in buffer
+        self.segments = list()  # spilled segment files, oldest first
+        self.next_segment = 0
+        self.index_file = None  # current index file, None until a merge wrote one
+        self.merging = None
+        self.lock = RLock()
+        self.merge_lock = Lock()
+
+    def _load(self):
+        if self.url_ids is not None:
+            return
+        with self.lock:
+            if self.url_ids is not None:
+                return
+            os.makedirs(self.directory, exist_ok=True)
+            url_ids = dict()
+            urls_file = os.path.join(self.directory, "urls.txt")
+            if os.path.exists(urls_file):
+                with open(urls_file, "r", encoding="utf-8") as file:
+                    for url_id, line in enumerate(file):
+                        url_ids[line.rstrip("\n")] = url_id
+            self.urls = open(urls_file, "a", encoding="utf-8")
+            names = os.listdir(self.directory)
+            indexes = sorted((name for name in names if name.startswith("index.") and name.endswith(".bin")),
+                             key=file_number)
+            merged = file_number(indexes[-1]) if indexes else -1
+            segments = list()
+            for name in names:
+                filename = os.path.join(self.directory, name)
+                if name.endswith(".tmp") or name in indexes[:-1]:
+                    os.remove(filename)     # a merge or spill cut short, or an index a merge replaced
+                elif name.endswith(".seg"):
+                    if file_number(name) <= merged:
+                        os.remove(filename)     # already in the index
+                    else:
+                        segments.append(filename)
+            self.segments = sorted(segments, key=file_number)
+            self.index_file = os.path.join(self.directory, indexes[-1]) if indexes else None
+            self.next_segment = max([merged] + [file_number(name) for name in self.segments]) + 1
+            self.url_ids = url_ids
+            atexit.register(self.close)
+
+    def url_id(self, url : str) -> int:
+        ''' Returns the id of url, assigning the next one if it is new. '''
+        self._load()
+        url = url.replace("\n", "%0A")
+        with self.lock:
+            url_id = self.url_ids.get(url)
+            if url_id is None:
+                url_id = self.url_ids[url] = len(self.url_ids)
+                self.urls.write(url + "\n")
+                self.urls.flush()
+            return url_id
+
+    def add(self, url : str, tokens) -> None:
+        ''' Adds the postings of one page. tokens: dict of token -> count. '''
+        url_id = self.url_id(url)
+        with self.lock:
+            for token, count in tokens.items():
+                postings = self.buffer.get(token)
+                if postings is None:
+                    postings = self.buffer[token] = array("I")
+                postings.append(url_id)
+                postings.append(count)
+            self.buffered += len(tokens)
+            if self.buffered >= self.memory_budget:
+                self.spill()
+
+    def spill(self) -> None:
+        ''' Writes the buffer to a new sorted segment file. '''
+        self._load()
+        with self.lock:
+            if not self.buffer:
+                return
+            filename = os.path.join(self.directory, f"{self.next_segment}.seg")
+            self.next_segment += 1
+            with open(f"{filename}.tmp", "wb") as file:
+                write_records(file, sorted(self.buffer.items()))
+            os.replace(f"{filename}.tmp", filename)
+            self.segments.append(filename)
+            self.buffer = dict()
+            self.buffered = 0
+            if len(self.segments) >= MERGE_SEGMENTS and not (self.merging and self.merging.is_alive()):
+                self.merging = Thread(target=self.merge, daemon=True)
+                self.merging.start()
+
+    def merge(self) -> None:
+        ''' Merges the current segments into a new index file. '''
+        with self.merge_lock:
+            with self.lock:
+                segments = list(self.segments)
+                index_file = self.index_file
+            if not segments:
+                return
+            sources = [read_records(filename) for filename in segments]
+            if index_file is not None:
+                sources.insert(0, read_records(index_file))
+            merged_file = os.path.join(self.directory, f"index.{file_number(segments[-1])}.bin")
+            with open(f"{merged_file}.tmp", "wb") as file:
+                write_records(file, merge_records(sources))
+                file.flush()
+                os.fsync(file.fileno())
+            with self.lock:
+                os.replace(f"{merged_file}.tmp", merged_file)   # from here on the segments are in the index
+                self.index_file = merged_file
+                self.segments = self.segments[len(segments):]
+            for filename in segments + ([index_file] if index_file is not None else []):
+                os.remove(filename)
+
+    def records(self):
+        ''' Yields (token, postings array of url id, count pairs) for every
+        token in the index, segments and buffer, in token order. '''
+        self._load()
+        with self.merge_lock:   # segments are not merged away while they are read
+            with self.lock:
+                files = list(self.segments)
+                if self.index_file is not None:
+                    files.insert(0, self.index_file)
+                buffered = [(token, array("I", postings)) for token, postings in sorted(self.buffer.items())]
+            sources = [read_records(filename) for filename in files]
+            sources.append(iter(buffered))
+            yield from merge_records(sources)
+
+    def urls_by_id(self):
+        ''' Returns the interned urls, indexed by url id. '''
+        self._load()
+        with self.lock:
+            return list(self.url_ids)
+
+    def absorb(self, other):
+        ''' Adds every posting of another TokenIndex to this one, re-interning its urls. '''
+        ids = [self.url_id(url) for url in other.urls_by_id()]
+        for token, postings in other.records():
+            postings[0::2] = array("I", (ids[url_id] for url_id in postings[0::2]))
+            with self.lock:
+                if token in self.buffer:
+                    self.buffer[token].extend(postings)
+                else:
+                    self.buffer[token] = postings
+                self.buffered += len(postings) // 2
+                if self.buffered >= self.memory_budget:
+                    self.spill()
+
+    def totals(self):
+        ''' Yields (token, total count over all urls) for every token. '''
+        for token, postings in self.records():
+            yield token, sum(postings[1::2])
+
+    def close(self) -> None:
+        if self.url_ids is None:
+            return
+        with self.lock:
+            self.spill()
+            self.urls.flush()
+
@@ -0,0 +1,68 @@
+from urllib.parse import urlparse
+
+SCHEMES = frozenset(["http", "https"])
+DOMAINS = ("ics.uci.edu", "cs.uci.edu", "informatics.uci.edu", "stat.uci.edu")
+# file extensions that do not point to a webpage
+EXTENSIONS = frozenset([
+    "css", "js", "bmp", "gif", "jpg", "jpeg", "ico",
+    "png", "tif", "tiff", "mid", "mp2", "mp3", "mp4",
+    "wav", "avi", "mov", "mpeg", "ram", "m4v", "mkv", "ogg", "ogv", "pdf",
+    "ps", "eps", "tex", "ppt", "pptx", "doc", "docx", "xls", "xlsx", "names",
+    "data", "dat", "exe", "bz2", "tar", "msi", "bin", "7z", "psd", "dmg", "iso",
+    "epub", "dll", "cnf", "tgz", "sha1",
+    "thmx", "mso", "arff", "rtf", "jar", "csv",
+    "rm", "smil", "wmv", "swf", "wma", "zip", "rar", "gz",
+    "odc", "ppsx", "git", "bib"])
+
+
+class UrlFilter(object):
+    ''' Decides which urls to crawl, built once and reused for every url.
+
+    Checks run cheapest first: scheme, host (a set lookup per dot-separated
+    suffix of the hostname), file extension (a set lookup), the host's
+    robots.txt rules if `robots` (a utils.robots.RobotsCache) is given and
+    has them cached, and only then the `is_similar` check against the urls
+    stored so far. '''
+
+    def __init__(self, is_similar, domains=DOMAINS, extensions=EXTENSIONS, robots=None):
+        self.is_similar = is_similar
+        self.domains = frozenset(domains)
+        self.extensions = frozenset(extensions)
+        self.robots = robots
+
+    def allowed_host(self, hostname):
+        # www.ics.uci.edu -> checks www.ics.uci.edu, ics.uci.edu, uci.edu, edu
+        while hostname:
+            if hostname in self.domains:
+                return True
+            hostname = hostname.partition(".")[2]
+        return False
+
+    def in_scope(self, url):
+        ''' Only the scheme and host checks, for urls that are not pages (sitemaps). '''
+        try:
+            parsed = urlparse(url)
+        except (AttributeError, TypeError, ValueError):
+            return False
+        return parsed.scheme in SCHEMES and bool(parsed.hostname) and self.allowed_host(parsed.hostname)
+
+    def is_valid(self, url):
+        try:
+            parsed = urlparse(url)
+        except (AttributeError, TypeError, ValueError):     # NoneType or malformed url
+            return False
+        if parsed.scheme not in SCHEMES:
+            return False
+        if not parsed.hostname or not self.allowed_host(parsed.hostname):
+            return False
+        path = parsed.path.lower()
+        if "." in path and path.rpartition(".")[2] in self.extensions:
+            return False
+        if self.robots is not None and not self.robots.allowed(parsed):
+            return False
+        return not self.is_similar(url)
+
+    def filter_urls(self, urls):
+        ''' Returns the urls worth crawling, in the same order. '''
+        is_valid = self.is_valid
+        return [url for url in urls if is_valid(url)]
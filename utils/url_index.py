@@ -0,0 +1,96 @@
+import bisect
+
+from threading import RLock
+from difflib import SequenceMatcher
+
+# urls per block of the sorted list; a block is split in two once it holds twice as many
+BLOCK_SIZE = 1024
+
+
+class SortedUrlIndex(object):
+    ''' Sorted list of stored urls kept in memory.
+
+    The urls are kept in sorted blocks of about BLOCK_SIZE urls, so an
+    insert only moves the urls of one block no matter how many are stored.
+    They are loaded once on first use from `load_urls()`. The index only
+    lives in memory, the PageStore writes the stored urls to disk. '''
+
+    def __init__(self, load_urls=list):
+        self.load_urls = load_urls
+        self.blocks = None      # sorted blocks of urls, loaded lazily
+        self.maxes = list()     # last url of each block
+        self.count = 0
+        self.lock = RLock()
+
+    def _load(self):
+        if self.blocks is not None:
+            return
+        with self.lock:
+            if self.blocks is not None:
+                return
+            urls = sorted(self.load_urls())
+            self.blocks = [urls[i:i + BLOCK_SIZE] for i in range(0, len(urls), BLOCK_SIZE)]
+            self.maxes = [block[-1] for block in self.blocks]
+            self.count = len(urls)
+
+    def __len__(self):
+        self._load()
+        return self.count
+
+    def snapshot(self) -> list:
+        ''' Returns a copy of the sorted urls. '''
+        self._load()
+        with self.lock:
+            return [url for block in self.blocks for url in block]
+
+    def add(self, url : str) -> None:
+        self._load()
+        with self.lock:
+            if not self.blocks:
+                self.blocks.append([url])
+                self.maxes.append(url)
+            else:
+                i = min(bisect.bisect_right(self.maxes, url), len(self.blocks) - 1)
+                block = self.blocks[i]
+                bisect.insort(block, url)   # O(log(N)) search, insert within one block
+                self.maxes[i] = block[-1]
+                if len(block) > 2 * BLOCK_SIZE:
+                    self.blocks[i:i + 1] = [block[:BLOCK_SIZE], block[BLOCK_SIZE:]]
+                    self.maxes[i:i + 1] = [block[BLOCK_SIZE - 1], block[-1]]
+            self.count += 1
+
+    def _get(self, index, block, offset):
+        ''' The url at index (negative counts from the end, like a list),
+        walking from block, whose first url is at offset. '''
+        if index < 0:
+            index += self.count
+        if not 0 <= index < self.count:
+            raise IndexError(index)
+        while index < offset:
+            block -= 1
+            offset -= len(self.blocks[block])
+        while index >= offset + len(self.blocks[block]):
+            offset += len(self.blocks[block])
+            block += 1
+        return self.blocks[block][index - offset]
+
+    def is_similar(self, s : str) -> bool:
+        ''' Same decision as the original file-based check: the url is too
+        similar if two of its sorted neighbours are both >= 95% similar. '''
+        self._load()
+        with self.lock:     # only the lookup is locked, the ratios are computed outside
+            if self.count < 3:
+                return False
+            block = min(bisect.bisect_right(self.maxes, s), len(self.blocks) - 1)
+            offset = sum(len(self.blocks[i]) for i in range(block))
+            idx = offset + bisect.bisect(self.blocks[block], s)     # get supposed new index of url in sorted list
+            try:
+                neighbours = [self._get(i, block, offset) for i in (idx - 2, idx - 1, idx, idx + 1)]
+            except IndexError:      # indexOutOfBounds, ignore and move on to next
+                return False
+
+        # similarity ratios, scaled 0-1
+        diff0, diff1, diff2, diff3 = [SequenceMatcher(None, s, url).ratio() for url in neighbours]
+        return ((diff0 >= 0.95 and diff1 >= 0.95)       # previous 2 are too similar
+                or (diff2 >= 0.95 and diff3 >= 0.95)    # following 2 are too similar
+                or (diff1 >= 0.95 and diff2 >= 0.95))   # surrounding 2 are too similar
@@ -0,0 +1,65 @@
+import re
+
+from threading import RLock
+from urllib.parse import urlparse, parse_qsl
+
+# Parts of a url that vary between pages of the same trap, replaced in this order.
+DATE = re.compile(r'\d{4}[-/.]\d{1,2}(?:[-/.]\d{1,2})?')       # 2019-05-12, 2019/05
+SESSION_ID = re.compile(r'[0-9a-fA-F]{16,}|[A-Za-z0-9]{24,}')    # hashes, tokens, session ids
+DIGITS = re.compile(r'\d+')
+
+
+def wildcard(part : str) -> str:
+    part = DATE.sub('<date>', part)
+    part = SESSION_ID.sub('<id>', part)
+    return DIGITS.sub('<n>', part)
+
+
+'''
+Returns the template of a url: its host, path and query keys, with dates,
+session ids and numbers replaced by wildcards.
+    Params:
+        url (str): url
+    Returns:
+        template (str): e.g. www.ics.uci.edu/community/news/view_news?id=<n>
+'''
+def url_template(url : str) -> str:
+    parsed = urlparse(url)
+    query = '&'.join(sorted(
+        f"{key}={wildcard(value)}" for key, value in parse_qsl(parsed.query, keep_blank_values=True)))
+    return f"{parsed.hostname}{wildcard(parsed.path)}?{query}"
+
+
+class UrlTrapDetector(object):
+    ''' Counts stored urls per template in a hash table. A url is a trap once
+    its template has been stored `threshold` times, which takes O(len(url))
+    to check no matter where the matching urls would sort. Counts are seeded
+    once from the urls already stored, `load_urls()`. '''
+
+    def __init__(self, threshold=50, load_urls=list):
+        self.threshold = threshold
+        self.load_urls = load_urls
+        self.counts = None      # template -> number of stored urls, loaded lazily
+        self.lock = RLock()
+
+    def _load(self):
+        if self.counts is not None:
+            return
+        with self.lock:
+            if self.counts is not None:
+                return
+            counts = dict()
+            for url in self.load_urls():
+                template = url_template(url)
+                counts[template] = counts.get(template, 0) + 1
+            self.counts = counts
+
+    def add(self, url : str) -> None:
+        self._load()
+        template = url_template(url)
+        with self.lock:
+            self.counts[template] = self.counts.get(template, 0) + 1
+
+    def is_trap(self, url : str) -> bool:
+        self._load()
+        return self.counts.get(url_template(url), 0) >= self.threshold